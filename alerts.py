@@ -0,0 +1,73 @@
+"""Сводные уведомления об ошибках для telegram.
+
+Первая ошибка сразу уходит в чат, повторы той же ошибки копятся и раз в
+ERROR_SUMMARY_INTERVAL секунд отправляются одной сводкой, а после
+первого успешного опроса приходит сообщение о восстановлении.
+Исключения-наследники NotForSend в чат не отправляются никогда.
+"""
+import hashlib
+import os
+import re
+import time
+
+from exceptions import NotForSend
+
+ERROR_SUMMARY_INTERVAL = float(os.getenv('ERROR_SUMMARY_INTERVAL', 3600))
+
+# Числа и хеши в тексте ошибки (коды, время, адреса) не делают её новой.
+VOLATILE = re.compile(r'0x[0-9a-f]+|\d+', re.IGNORECASE)
+
+
+def error_key(error: Exception) -> tuple:
+    """Класс исключения и отпечаток его текста."""
+    text = VOLATILE.sub('#', str(error))
+    return (type(error).__name__,
+            hashlib.blake2b(text.encode(), digest_size=8).hexdigest())
+
+
+class ErrorAggregator:
+    """Решает, какие сообщения об ошибках отправлять в чат."""
+
+    def __init__(self, interval: float = ERROR_SUMMARY_INTERVAL,
+                 clock=time.monotonic):
+        self.interval = interval
+        self.clock = clock
+        # Ключ ошибки -> [не отправлено повторов, всего, когда сообщали].
+        self.active = {}
+
+    def report(self, error: Exception):
+        """Учитывает ошибку; текст для немедленной отправки или None."""
+        if isinstance(error, NotForSend):
+            return None
+        key = error_key(error)
+        entry = self.active.get(key)
+        if entry is not None:
+            entry[0] += 1
+            entry[1] += 1
+            return None
+        self.active[key] = [0, 1, self.clock()]
+        return f'Сбой в работе программы: {error}'
+
+    def summaries(self) -> list:
+        """Сводки по ошибкам, о которых не сообщали interval секунд."""
+        now = self.clock()
+        messages = []
+        for (name, _), entry in self.active.items():
+            if entry[0] and now - entry[2] >= self.interval:
+                messages.append(f'{name} ×{entry[0]} за последние '
+                                f'{round(self.interval / 60)} мин')
+                entry[0] = 0
+                entry[2] = now
+        return messages
+
+    def resolve(self) -> list:
+        """Сообщение о восстановлении после успешного опроса."""
+        if not self.active:
+            return []
+        totals = {}
+        for (name, _), entry in self.active.items():
+            totals[name] = totals.get(name, 0) + entry[1]
+        self.active.clear()
+        return ['Работа восстановлена. Ошибок за время сбоя: ' + ', '.join(
+            f'{name} ×{count}' for name, count in totals.items()
+        )]
@@ -0,0 +1 @@
+"""Нагрузочные тесты HOMEWORK Статус-БОТа."""
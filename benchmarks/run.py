@@ -0,0 +1,236 @@
+"""Нагрузочный прогон конвейера опроса на локальных заменителях.
+
+Пример:
+    python -m benchmarks.run --subscriptions 500 --rounds 5 --latency 0.02
+
+Результат пишется в benchmarks/results/<коммит>.json, а с ключом
+--compare печатается разница с сохранённым ранее результатом.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import homework
+from benchmarks.stubs import PracticumStub, TelegramStub, make_homework
+from sessions import SessionPool
+from supervisor import shard_of
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+BENCH_TOKEN = '1234:abcdefg'
+
+
+def current_rss_kb() -> int:
+    """Текущий RSS процесса в КБ."""
+    try:
+        with open('/proc/self/status', encoding='UTF-8') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def git_commit() -> str:
+    """Хеш текущего коммита или 'unknown'."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def poll_once(bot, session, subscription: int) -> tuple:
+    """Один проход get_api_answer -> check_response -> send_message.
+
+    Возвращает (длительность, отправлено сообщений, была ли ошибка).
+    """
+    started = time.perf_counter()
+    sent = 0
+    try:
+        response = homework.fetch_api_answer(
+            {'Authorization': f'OAuth token{subscription}'}, 0, session
+        )
+        for homework_item in homework.check_response(response):
+            sent += homework.deliver_message(
+                bot, str(subscription), homework.parse_status(homework_item)
+            )
+    except Exception:
+        return time.perf_counter() - started, sent, True
+    return time.perf_counter() - started, sent, False
+
+
+def percentile(samples: list, share: float) -> float:
+    """Перцентиль выборки, share от 0 до 1."""
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=1000)[int(share * 1000) - 1]
+
+
+def measure_records(count: int) -> dict:
+    """Время проверки и память на запись для dict и Homework."""
+    raw = [make_homework(number) for number in range(count)]
+    started = time.perf_counter()
+    homework.build_records(raw)
+    elapsed = time.perf_counter() - started
+
+    payload = json.dumps({'homeworks': raw})
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    dicts = json.loads(payload)['homeworks']
+    dict_bytes = tracemalloc.get_traced_memory()[0] - before
+    records = homework.build_records(dicts)
+    del dicts
+    # После удаления dict в памяти остаются только записи и их названия.
+    record_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del records
+    return {
+        'validation_us_per_record': round(elapsed / count * 1e6, 3),
+        'dict_bytes_per_record': dict_bytes // count,
+        'record_bytes_per_record': record_bytes // count,
+    }
+
+
+def poll_share(endpoint: str, base_url: str, numbers: list, rounds: int,
+               concurrency: int) -> tuple:
+    """Опрашивает подписки numbers в одном процессе.
+
+    Возвращает результаты poll_once и счётчики соединений пула.
+    """
+    endpoint, homework.ENDPOINT = homework.ENDPOINT, endpoint
+    pool = SessionPool(pool_size=concurrency)
+    bot = pool.create_bot(BENCH_TOKEN, base_url=base_url)
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(
+                lambda number: poll_once(bot, pool, number),
+                [number for _ in range(rounds) for number in numbers],
+            ))
+        return results, pool.stats()
+    finally:
+        homework.ENDPOINT = endpoint
+        pool.close()
+
+
+def run_benchmark(subscriptions: int = 100, rounds: int = 3,
+                  concurrency: int = 16, homeworks: int = 1,
+                  latency: float = 0.0, error_rate: float = 0.0,
+                  records: int = 10000, processes: int = 1) -> dict:
+    """Прогоняет конвейер и возвращает метрики.
+
+    При processes > 1 подписки делятся между процессами так же, как
+    между воркерами supervisor.py.
+    """
+    rss_before = current_rss_kb()
+    with PracticumStub(homeworks=homeworks, latency=latency,
+                       error_rate=error_rate) as practicum, \
+            TelegramStub(latency=latency, error_rate=error_rate) as tg:
+        shares = [[number for number in range(subscriptions)
+                   if shard_of(str(number), processes) == shard]
+                  for shard in range(processes)]
+        started = time.perf_counter()
+        if processes == 1:
+            outputs = [poll_share(practicum.endpoint, tg.base_url,
+                                  shares[0], rounds, concurrency)]
+        else:
+            with multiprocessing.get_context('fork').Pool(processes) as pool:
+                outputs = pool.starmap(poll_share, [
+                    (practicum.endpoint, tg.base_url, share, rounds,
+                     concurrency) for share in shares
+                ])
+        elapsed = time.perf_counter() - started
+    results = [result for output in outputs for result in output[0]]
+    connections = {}
+    for _, stats in outputs:
+        for key, value in flatten(stats).items():
+            connections[key] = connections.get(key, 0) + value
+    latencies = [result[0] for result in results]
+    return {
+        'polls': len(results),
+        'errors': sum(result[2] for result in results),
+        'messages_sent': sum(result[1] for result in results),
+        'elapsed_s': round(elapsed, 4),
+        'polls_per_s': round(len(results) / elapsed, 2),
+        'latency_p50_ms': round(percentile(latencies, 0.5) * 1000, 3),
+        'latency_p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'rss_kb': current_rss_kb(),
+        'rss_growth_kb': current_rss_kb() - rss_before,
+        'connections': connections,
+        'records': measure_records(records) if records else {},
+    }
+
+
+def flatten(metrics: dict, prefix: str = '') -> dict:
+    """Вложенные метрики в виде {'группа.метрика': значение}."""
+    flat = {}
+    for key, value in metrics.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f'{prefix}{key}.'))
+        else:
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+
+def compare(result: dict, baseline: dict) -> list:
+    """Строки с относительным изменением числовых метрик."""
+    lines = []
+    base_metrics = flatten(baseline['metrics'])
+    for key, value in flatten(result['metrics']).items():
+        base = base_metrics.get(key)
+        if isinstance(value, (int, float)) and base:
+            lines.append(f'{key}: {base} -> {value} '
+                         f'({(value - base) / base:+.1%})')
+    return lines
+
+
+def main(argv: list = None) -> dict:
+    """Разбирает аргументы, запускает прогон и сохраняет результат."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--subscriptions', type=int, default=100)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--homeworks', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--records', type=int, default=10000,
+                        help='размер выборки для замера записей о работах')
+    parser.add_argument('--processes', type=int, default=1,
+                        help='число процессов, как у supervisor.py')
+    parser.add_argument('--output', help='файл для результата')
+    parser.add_argument('--compare', help='результат для сравнения')
+    args = parser.parse_args(argv)
+    params = {key: value for key, value in vars(args).items()
+              if key not in ('output', 'compare')}
+    result = {
+        'commit': git_commit(),
+        'timestamp': int(time.time()),
+        'python': sys.version.split()[0],
+        'params': params,
+        'metrics': run_benchmark(**params),
+    }
+    output = args.output or os.path.join(RESULTS_DIR,
+                                         f'{result["commit"]}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='UTF-8') as file:
+        json.dump(result, file, ensure_ascii=False, indent=2)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.compare:
+        with open(args.compare, encoding='UTF-8') as file:
+            print('\n'.join(compare(result, json.load(file))))
+    return result
+
+
+if __name__ == '__main__':
+    main()
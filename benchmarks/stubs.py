@@ -0,0 +1,212 @@
+"""Локальные заменители API Практикума и Bot API telegram."""
+import http.client
+import json
+import random
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse, urlsplit
+
+STATUSES = ('reviewing', 'approved', 'rejected')
+
+
+def make_homework(number: int, status: str = None) -> dict:
+    """Запись о работе в формате API Практикума."""
+    return {
+        'id': number,
+        'status': status or STATUSES[number % len(STATUSES)],
+        'homework_name': f'student__hw{number:04d}.zip',
+        'reviewer_comment': 'Всё нравится' * (number % 3),
+        'date_updated': '2022-02-13T14:40:57Z',
+        'lesson_name': f'Спринт {number}',
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Общая часть обработчиков: keep-alive, задержка, ошибки."""
+
+    protocol_version = 'HTTP/1.1'
+    # Заголовки и тело пишутся разными send(): без TCP_NODELAY прогон
+    # мерил бы ожидание отложенного ACK, а не работу бота.
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        """Не засоряет вывод прогона логом запросов."""
+
+    def send_json(self, status: int, payload, headers: dict = None) -> None:
+        """Отправляет JSON-ответ."""
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def simulate(self) -> bool:
+        """Задержка и случайный отказ, True - если нужно ответить ошибкой."""
+        stub = self.server.stub
+        stub.requests += 1
+        if stub.latency:
+            time.sleep(random.uniform(0, 2 * stub.latency))
+        return random.random() < stub.error_rate
+
+
+class PracticumHandler(StubHandler):
+    """GET homework_statuses/?from_date=..."""
+
+    def do_GET(self):
+        """Ответ со списком работ."""
+        if self.simulate():
+            self.send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {})
+            return
+        if not self.headers.get('Authorization', '').startswith('OAuth '):
+            self.send_json(HTTPStatus.UNAUTHORIZED, {
+                'code': 'not_authenticated',
+                'message': 'Учетные данные не были предоставлены.',
+                'source': '__response__',
+            })
+            return
+        query = parse_qs(urlparse(self.path).query)
+        from_date = int(query.get('from_date', ['0'])[0])
+        self.send_json(HTTPStatus.OK, self.server.stub.payload(from_date))
+
+
+class TelegramHandler(StubHandler):
+    """POST /bot<token>/<method> в формате Bot API."""
+
+    def do_POST(self):
+        """Ответ на вызов метода бота."""
+        length = int(self.headers.get('Content-Length', 0))
+        data = json.loads(self.rfile.read(length) or b'{}')
+        if self.simulate():
+            self.send_json(HTTPStatus.TOO_MANY_REQUESTS, {
+                'ok': False, 'error_code': 429,
+                'description': 'Too Many Requests: retry after 1',
+                'parameters': {'retry_after': 1},
+            })
+            return
+        method = self.path.rsplit('/', 1)[-1]
+        self.server.stub.calls.append((method, data))
+        if method == 'getMe':
+            result = {'id': 1, 'is_bot': True, 'first_name': 'stub'}
+        else:
+            result = {
+                'message_id': len(self.server.stub.calls),
+                'date': int(time.time()),
+                'chat': {'id': int(data.get('chat_id', 0)),
+                         'type': 'private'},
+                'text': data.get('text', ''),
+            }
+        self.send_json(HTTPStatus.OK, {'ok': True, 'result': result})
+
+
+class StubServer:
+    """HTTP-сервер заменителя в фоновом потоке."""
+
+    handler = StubHandler
+
+    def __init__(self, latency: float = 0, error_rate: float = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), self.handler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self
+        self._thread = threading.Thread(target=self.httpd.serve_forever,
+                                        daemon=True)
+
+    @property
+    def url(self) -> str:
+        """Адрес сервера."""
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class PracticumStub(StubServer):
+    """Заменитель API Практикума с заданным размером списка работ."""
+
+    handler = PracticumHandler
+
+    def __init__(self, homeworks: int = 1, **kwargs):
+        super().__init__(**kwargs)
+        self.homeworks = homeworks
+
+    @property
+    def endpoint(self) -> str:
+        """Адрес, подставляемый вместо homework.ENDPOINT."""
+        return f'{self.url}/api/user_api/homework_statuses/'
+
+    def payload(self, from_date: int) -> dict:
+        """Тело ответа на запрос с from_date."""
+        return {
+            'homeworks': [make_homework(number)
+                          for number in range(self.homeworks)],
+            'current_date': max(int(time.time()), from_date),
+        }
+
+
+class TelegramStub(StubServer):
+    """Заменитель Bot API, запоминающий вызванные методы."""
+
+    handler = TelegramHandler
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = []
+
+    @property
+    def base_url(self) -> str:
+        """Значение base_url для telegram.Bot."""
+        return f'{self.url}/bot'
+
+
+class UpdateDelivery:
+    """Заменитель доставки обновлений telegram на webhook.
+
+    Как и telegram, шлёт POST с обновлением через keep-alive соединение
+    и заголовком секрета, возвращает разобранный ответ webhook.
+    """
+
+    def __init__(self, url: str, secret: str = ''):
+        parts = urlsplit(url)
+        self.path = parts.path or '/'
+        self.secret = secret
+        self.update_id = 0
+        self.connection = http.client.HTTPConnection(parts.netloc,
+                                                     timeout=10)
+
+    def send_command(self, chat_id: int, text: str) -> tuple:
+        """Доставляет сообщение с командой, возвращает (код, ответ)."""
+        self.update_id += 1
+        update = {
+            'update_id': self.update_id,
+            'message': {
+                'message_id': self.update_id,
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private'},
+                'text': text,
+            },
+        }
+        headers = {'Content-Type': 'application/json'}
+        if self.secret:
+            headers['X-Telegram-Bot-Api-Secret-Token'] = self.secret
+        self.connection.request('POST', self.path,
+                                json.dumps(update).encode('utf-8'), headers)
+        response = self.connection.getresponse()
+        body = response.read()
+        return response.status, json.loads(body) if body else None
+
+    def close(self) -> None:
+        """Закрывает соединение."""
+        self.connection.close()
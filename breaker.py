@@ -0,0 +1,109 @@
+"""Circuit breaker для запросов к API Практикума."""
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import metrics
+from exceptions import CircuitOpen
+
+logger = logging.getLogger(__name__)
+
+BREAKER_FAILURE_RATE = float(os.getenv('BREAKER_FAILURE_RATE', 0.5))
+BREAKER_MIN_CALLS = int(os.getenv('BREAKER_MIN_CALLS', 10))
+BREAKER_WINDOW = int(os.getenv('BREAKER_WINDOW', 50))
+BREAKER_OPEN_PERIOD = float(os.getenv('BREAKER_OPEN_PERIOD', 60))
+BREAKER_PROBES = int(os.getenv('BREAKER_PROBES', 3))
+
+CLOSED, HALF_OPEN, OPEN = 'closed', 'half_open', 'open'
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_STATE = metrics.gauge(
+    'homework_api_circuit_state',
+    'Состояние circuit breaker API: 0 - закрыт, 1 - проба, 2 - открыт'
+)
+CIRCUIT_REJECTED = metrics.counter(
+    'homework_api_circuit_rejected',
+    'Запросы к API, не отправленные из-за открытого circuit breaker'
+)
+
+
+class CircuitBreaker:
+    """Общий для всех подписок предохранитель запросов к API.
+
+    Пока доля сбоев среди последних window запросов ниже failure_rate,
+    запросы идут как обычно. После этого запросы open_period секунд
+    отклоняются исключением CircuitOpen, затем пропускается не больше
+    probes пробных запросов. Если все они успешны, предохранитель
+    закрывается, любой сбой открывает его снова.
+    """
+
+    def __init__(self, failure_rate: float = BREAKER_FAILURE_RATE,
+                 min_calls: int = BREAKER_MIN_CALLS,
+                 window: int = BREAKER_WINDOW,
+                 open_period: float = BREAKER_OPEN_PERIOD,
+                 probes: int = BREAKER_PROBES, clock=time.monotonic):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_period = open_period
+        self.probes = probes
+        self.clock = clock
+        self.results = deque(maxlen=window)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probes_started = self.probes_passed = 0
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.set(STATE_CODES[CLOSED])
+
+    def _switch(self, state: str) -> None:
+        self.state = state
+        CIRCUIT_STATE.set(STATE_CODES[state])
+        if state == OPEN:
+            self.opened_at = self.clock()
+            logger.warning('API недоступен, запросы приостановлены на %s с',
+                           self.open_period)
+        elif state == HALF_OPEN:
+            self.probes_started = self.probes_passed = 0
+            logger.info('Пробные запросы к API')
+        else:
+            self.results.clear()
+            logger.info('API снова доступен, запросы возобновлены')
+
+    def before_call(self) -> None:
+        """Разрешает запрос или поднимает CircuitOpen."""
+        with self._lock:
+            if (self.state == OPEN
+                    and self.clock() - self.opened_at >= self.open_period):
+                self._switch(HALF_OPEN)
+            if self.state == CLOSED:
+                return
+            if (self.state == HALF_OPEN
+                    and self.probes_started < self.probes):
+                self.probes_started += 1
+                return
+        CIRCUIT_REJECTED.inc()
+        raise CircuitOpen('API недоступен, запрос не отправлялся')
+
+    def record_success(self) -> None:
+        """Учитывает успешный запрос."""
+        with self._lock:
+            if self.state == CLOSED:
+                self.results.append(True)
+            elif self.state == HALF_OPEN:
+                self.probes_passed += 1
+                if self.probes_passed >= self.probes:
+                    self._switch(CLOSED)
+
+    def record_failure(self) -> None:
+        """Учитывает сбой запроса."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._switch(OPEN)
+            elif self.state == CLOSED:
+                self.results.append(False)
+                failures = self.results.count(False)
+                if (len(self.results) >= self.min_calls
+                        and failures / len(self.results)
+                        >= self.failure_rate):
+                    self._switch(OPEN)
@@ -0,0 +1,102 @@
+"""Сетевые таймауты и бюджет времени на итерацию опроса.
+
+Каждый запрос к API и к Bot API получает таймауты подключения и чтения.
+Итерация опроса, обёрнутая в Deadline, делит общий бюджет
+ITERATION_BUDGET между запросом, проверкой ответа и отправкой сообщений:
+таймауты запросов урезаются до остатка бюджета, а работа, начатая после
+его исчерпания, прерывается исключением DeadlineExceeded. Неотправленные
+сообщения не отмечаются в трекере и курсор не сдвигается, поэтому они
+уходят на следующей итерации.
+
+Текущий Deadline хранится в contextvars: он виден в потоках
+asyncio.to_thread и свой у каждой задачи движка.
+"""
+import contextvars
+import os
+import time
+
+import metrics
+from exceptions import DeadlineExceeded
+
+API_CONNECT_TIMEOUT = float(os.getenv('API_CONNECT_TIMEOUT', 3.05))
+API_READ_TIMEOUT = float(os.getenv('API_READ_TIMEOUT', 10))
+TELEGRAM_CONNECT_TIMEOUT = float(os.getenv('TELEGRAM_CONNECT_TIMEOUT', 3.05))
+TELEGRAM_READ_TIMEOUT = float(os.getenv('TELEGRAM_READ_TIMEOUT', 10))
+ITERATION_BUDGET = float(os.getenv('ITERATION_BUDGET', 60))
+
+DEADLINE_EXCEEDED = metrics.counter(
+    'homework_deadline_exceeded',
+    'Работа, отложенная из-за исчерпанного бюджета итерации', ('stage',)
+)
+NETWORK_TIMEOUTS = metrics.counter(
+    'homework_network_timeouts', 'Запросы, прерванные по таймауту',
+    ('endpoint',)
+)
+for stage in ('fetch', 'validate', 'send'):
+    DEADLINE_EXCEEDED.labels(stage)
+for endpoint in ('api', 'telegram'):
+    NETWORK_TIMEOUTS.labels(endpoint)
+
+_current = contextvars.ContextVar('deadline', default=None)
+
+
+class Deadline:
+    """Бюджет времени итерации; внутри блока with - текущий."""
+
+    def __init__(self, budget: float = ITERATION_BUDGET,
+                 clock=time.monotonic):
+        self.budget = budget
+        self.clock = clock
+        self.expires = clock() + budget
+        self._token = None
+
+    def remaining(self) -> float:
+        """Оставшееся время в секундах, не меньше нуля."""
+        return max(self.expires - self.clock(), 0.0)
+
+    def check(self, stage: str) -> None:
+        """Поднимает DeadlineExceeded, если бюджет исчерпан."""
+        if self.clock() >= self.expires:
+            DEADLINE_EXCEEDED.labels(stage).inc()
+            raise DeadlineExceeded(
+                f'Бюджет итерации {self.budget:.0f} с исчерпан '
+                f'на этапе {stage}'
+            )
+
+    def __enter__(self) -> 'Deadline':
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        _current.reset(self._token)
+
+
+def check_budget(stage: str) -> None:
+    """Проверка бюджета текущей итерации, если он задан."""
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check(stage)
+
+
+def timeouts(connect: float, read: float, stage: str) -> tuple:
+    """Таймауты (подключение, чтение), урезанные до остатка бюджета.
+
+    Таймаут чтения ограничивает ожидание каждой порции ответа, поэтому
+    итерация может превысить бюджет не больше чем на один таймаут.
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return connect, read
+    deadline.check(stage)
+    remaining = deadline.remaining()
+    return min(connect, remaining), min(read, remaining)
+
+
+def api_timeouts() -> tuple:
+    """Таймауты запроса к API Практикума."""
+    return timeouts(API_CONNECT_TIMEOUT, API_READ_TIMEOUT, 'fetch')
+
+
+def telegram_timeouts() -> tuple:
+    """Таймауты запроса к Bot API."""
+    return timeouts(TELEGRAM_CONNECT_TIMEOUT, TELEGRAM_READ_TIMEOUT, 'send')
@@ -0,0 +1,96 @@
+"""Дайджест: несколько изменений статусов одним сообщением telegram.
+
+С DIGEST_WINDOW > 0 сообщения о статусах не уходят по одному:
+MessageSender копит их по чатам DIGEST_WINDOW секунд от первого
+сообщения и отправляет одним, а main() склеивает переходы одного
+опроса. Сообщение режется по лимиту telegram в MESSAGE_LIMIT символов.
+Переходы в статусы из DIGEST_URGENT (по умолчанию rejected) и
+сообщения о сбоях отправляются сразу, минуя дайджест.
+"""
+import os
+import time
+
+DIGEST_WINDOW = float(os.getenv('DIGEST_WINDOW', 0))  # Секунды.
+DIGEST_URGENT = frozenset(
+    filter(None, os.getenv('DIGEST_URGENT', 'rejected').split(','))
+)
+MESSAGE_LIMIT = 4096  # Символов в одном сообщении telegram.
+DIGEST_HEADER = 'Изменились статусы работ:'
+
+
+def is_urgent(status: str) -> bool:
+    """Отправлять ли переход в статус status без ожидания дайджеста."""
+    return status in DIGEST_URGENT
+
+
+def pack(parts: list, limit: int = MESSAGE_LIMIT,
+         header: str = DIGEST_HEADER) -> list:
+    """Склеивает части в сообщения не длиннее limit символов.
+
+    Возвращает [(текст, число частей, закончившихся в этом сообщении)]
+    в исходном порядке. Одна часть отправляется как есть, без заголовка;
+    часть длиннее limit режется на несколько сообщений.
+    """
+    if len(parts) == 1 and len(parts[0]) <= limit:
+        return [(parts[0], 1)]
+    messages = []
+    text, count = header, 0
+    for part in parts:
+        if count and len(text) + 1 + len(part) > limit:
+            messages.append((text, count))
+            text, count = header, 0
+        if len(header) + 1 + len(part) > limit:
+            if count:
+                messages.append((text, count))
+                text, count = header, 0
+            pieces = [part[start:start + limit]
+                      for start in range(0, len(part), limit)]
+            messages += [(piece, 0) for piece in pieces[:-1]]
+            messages.append((pieces[-1], 1))
+            continue
+        text = f'{text}\n{part}'
+        count += 1
+    if count:
+        messages.append((text, count))
+    return messages
+
+
+class DigestBuffer:
+    """Сообщения, ожидающие дайджеста, по чатам.
+
+    Окно чата открывается первым сообщением и закрывается через window
+    секунд, поэтому задержка сообщения не больше window.
+    """
+
+    def __init__(self, window: float = DIGEST_WINDOW,
+                 limit: int = MESSAGE_LIMIT, clock=time.monotonic):
+        self.window = window
+        self.limit = limit
+        self.clock = clock
+        # Чат -> (когда отправить, сообщения).
+        self.chats = {}
+
+    def add(self, chat_id, message: str) -> None:
+        """Откладывает сообщение до закрытия окна чата."""
+        if chat_id not in self.chats:
+            self.chats[chat_id] = (self.clock() + self.window, [])
+        self.chats[chat_id][1].append(message)
+
+    def due(self, force: bool = False) -> list:
+        """[(чат, текст)] для чатов с закрытым окном; force - для всех."""
+        now = self.clock()
+        ready = [chat_id for chat_id, (deadline, _) in self.chats.items()
+                 if force or deadline <= now]
+        return [(chat_id, text)
+                for chat_id in ready
+                for text, _ in pack(self.chats.pop(chat_id)[1], self.limit)]
+
+    def next_due(self):
+        """Секунд до закрытия ближайшего окна или None, если пусто."""
+        if not self.chats:
+            return None
+        return max(min(deadline for deadline, _ in self.chats.values())
+                   - self.clock(), 0)
+
+    def __len__(self) -> int:
+        return sum(len(messages) for _, messages in self.chats.values())
@@ -0,0 +1,501 @@
+"""Асинхронный движок опроса API для множества подписок."""
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import telegram
+
+import homework
+import metrics
+from alerts import ErrorAggregator
+from breaker import CircuitBreaker
+from deadline import ITERATION_BUDGET, Deadline
+from digest import is_urgent
+from exceptions import CircuitOpen
+from fingerprint import PollResult, ResponseCache, fetch_if_changed
+from journal import JOURNAL_PATH, Journal
+from logs import setup_logging
+from profiling import Profiler
+from recorder import RECORD_PATH, Recorder
+from scheduler import (
+    WHEEL_TICK, AdaptiveSchedule, TimerWheel, jitter_offset
+)
+from sender import MessageSender
+from sessions import SessionPool
+from shutdown import EXIT_TIMEOUT, SHUTDOWN_TIMEOUT
+from webhook import WEBHOOK_PORT, StatusBoard, start_webhook_server
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIPTIONS_FILE = os.getenv('SUBSCRIPTIONS_FILE', 'subscriptions.json')
+MAX_CONCURRENCY = int(os.getenv('MAX_CONCURRENCY', 64))
+EXECUTOR_PREFIX = 'engine'  # Имена потоков пула движка.
+
+MAX_CURSOR_LAG = metrics.gauge(
+    'homework_engine_max_cursor_lag_seconds',
+    'Наибольшее отставание курсора среди подписок'
+)
+SEND_QUEUE_DEPTH = metrics.gauge(
+    'homework_send_queue_depth', 'Сообщения в очереди отправки'
+)
+
+
+class Subscription(NamedTuple):
+    """Пара токен Практикума - чат telegram."""
+
+    practicum_token: str
+    chat_id: str
+
+    @property
+    def headers(self) -> dict:
+        """Заголовки запроса к API для этой подписки."""
+        return {'Authorization': f'OAuth {self.practicum_token}'}
+
+    @property
+    def key(self) -> str:
+        """Ключ подписки для журнала, не раскрывающий токен."""
+        token_hash = hashlib.sha256(self.practicum_token.encode()).hexdigest()
+        return f'{self.chat_id}:{token_hash[:16]}'
+
+
+def load_subscriptions(path: str = SUBSCRIPTIONS_FILE) -> list:
+    """Загружает подписки из JSON-файла или из переменных окружения.
+
+    Файл содержит список объектов с ключами practicum_token и chat_id.
+    Если файла нет, используется единственная пара из окружения.
+    """
+    if not os.path.exists(path):
+        if homework.PRACTICUM_TOKEN and homework.TELEGRAM_CHAT_ID:
+            return [Subscription(homework.PRACTICUM_TOKEN,
+                                 homework.TELEGRAM_CHAT_ID)]
+        return []
+    with open(path, encoding='UTF-8') as file:
+        raw_subscriptions = json.load(file)
+    return list(dict.fromkeys(
+        Subscription(str(item['practicum_token']), str(item['chat_id']))
+        for item in raw_subscriptions
+    ))
+
+
+async def async_get_api_answer(subscription: Subscription,
+                               current_timestamp: int,
+                               session=homework.requests,
+                               breaker: CircuitBreaker = None) -> dict:
+    """Асинхронная версия get_api_answer для одной подписки."""
+    return await asyncio.to_thread(
+        homework.fetch_api_answer, subscription.headers, current_timestamp,
+        session, breaker
+    )
+
+
+async def async_send_message(bot: telegram.Bot, chat_id: str,
+                             message: str) -> bool:
+    """Асинхронная версия send_message для произвольного чата."""
+    return await asyncio.to_thread(
+        homework.deliver_message, bot, chat_id, message
+    )
+
+
+class PollingEngine:
+    """Опрашивает API для всех подписок из одного event loop.
+
+    Число одновременных запросов ограничено семафором, поэтому
+    тысячи подписок не открывают тысячи соединений разом. Остановка
+    укладывается в shutdown_timeout секунд от вызова stop(): каждый её
+    этап получает только оставшееся время (remaining()).
+    """
+
+    def __init__(self, bot: telegram.Bot, subscriptions: list,
+                 concurrency: int = MAX_CONCURRENCY,
+                 period: int = homework.RETRY_PERIOD,
+                 session=homework.requests, schedule=None,
+                 journal: Journal = None, sender: MessageSender = None,
+                 cache: ResponseCache = None,
+                 breaker: CircuitBreaker = None, profiler: Profiler = None,
+                 shutdown_timeout: float = SHUTDOWN_TIMEOUT):
+        self.bot = bot
+        self.session = session
+        self.subscriptions = subscriptions
+        self.concurrency = concurrency
+        self.period = period
+        self.journal = journal
+        self.sender = sender
+        self.cache = cache
+        self.breaker = breaker
+        self.profiler = profiler
+        self.cursors = {}
+        self.trackers = {}
+        self.alerts = defaultdict(ErrorAggregator)
+        for subscription in subscriptions:
+            self.cursors[subscription], self.trackers[subscription] = (
+                homework.restore_state(journal, subscription.key)
+            )
+        # Последний статус подписки выбирает период опроса, поэтому
+        # после перезапуска он берётся из восстановленного трекера.
+        self.statuses = {
+            subscription: tracker.latest_status()
+            for subscription, tracker in self.trackers.items()
+        }
+        self.schedule = schedule
+        self.wheel = None
+        self.tasks = set()
+        # Подписка -> начало идущего опроса по time.monotonic().
+        self.in_flight = {}
+        self.shutdown_timeout = shutdown_timeout
+        # Срок остановки по time.monotonic(), задаётся в stop().
+        self.deadline = None
+        # Потоки пула, не завершившиеся к сроку остановки.
+        self.stragglers = 0
+        self._semaphore = None
+        self._stopping = None
+
+    async def poll(self, subscription: Subscription) -> bool:
+        """Один цикл опроса для подписки.
+
+        Возвращает True, если статус работы изменился.
+        """
+        changed = False
+        async with self._semaphore:
+            try:
+                with Deadline():
+                    result = await self.fetch(subscription)
+                    changed, current_date = await self.handle_result(
+                        subscription, result
+                    )
+                if current_date is not None:
+                    self.advance_cursor(subscription, current_date)
+
+            except CircuitOpen:
+                logger.debug('Опрос подписки %s пропущен: API недоступен',
+                             subscription.key)
+
+            except Exception as error:
+                self.forget_fingerprint(subscription)
+                homework.ERRORS.labels(type(error).__name__).inc()
+                logger.error('Сбой в работе программы: %s', error,
+                             exc_info=True)
+                await self.notify(subscription,
+                                  [self.alerts[subscription].report(error)])
+
+            else:
+                homework.HEALTH.poll_succeeded()
+                await self.notify(subscription,
+                                  self.alerts[subscription].resolve())
+            await self.notify(subscription,
+                              self.alerts[subscription].summaries())
+        return changed
+
+    async def notify(self, subscription: Subscription,
+                     messages: list) -> None:
+        """Отправляет подписчику сообщения об ошибках."""
+        for message in messages:
+            if message:
+                await self.send(subscription.chat_id, message)
+
+    async def fetch(self, subscription: Subscription) -> PollResult:
+        """Запрос к API, с быстрым путём при включённом кэше ответов."""
+        cursor = self.cursors[subscription]
+        if self.cache is None:
+            return PollResult(await async_get_api_answer(
+                subscription, cursor, self.session, self.breaker
+            ))
+        return await asyncio.to_thread(
+            fetch_if_changed, self.cache, subscription.key,
+            subscription.headers, cursor, self.session, self.breaker
+        )
+
+    async def handle_result(self, subscription: Subscription,
+                            result: PollResult) -> tuple:
+        """Обрабатывает ответ, возвращает (были ли изменения, курсор)."""
+        if result.stream is not None:
+            tracker = self.trackers[subscription]
+            # Поток читается из сокета, поэтому разбирается в потоке.
+            records = await asyncio.to_thread(
+                lambda: [record for record
+                         in homework.iter_records(result.stream)
+                         if tracker.is_changed(record)]
+            )
+            return (await self.process_homeworks(subscription, records),
+                    result.stream.current_date)
+        if result.response is None:
+            return False, result.current_date
+        records = homework.build_records(
+            homework.check_response(result.response)
+        )
+        return (await self.process_homeworks(subscription, records),
+                result.response['current_date'])
+
+    def forget_fingerprint(self, subscription: Subscription) -> None:
+        """После сбоя следующий ответ разбирается и проверяется целиком."""
+        if self.cache is not None:
+            self.cache.forget(subscription.key)
+
+    def advance_cursor(self, subscription: Subscription,
+                       current_date: int) -> None:
+        """Сдвигает курсор подписки и сохраняет его в журнал."""
+        self.cursors[subscription] = current_date
+        if self.journal is not None:
+            self.journal.record_cursor(subscription.key, current_date)
+
+    async def process_homeworks(self, subscription: Subscription,
+                                records: list) -> bool:
+        """Отправляет сообщения об изменившихся статусах работ."""
+        tracker = self.trackers[subscription]
+        changed = tracker.diff(records)
+        if not changed:
+            logger.info('Нет новых статусов')
+            return False
+        self.statuses[subscription] = changed[0].status
+        for record in reversed(changed):
+            if await self.send(subscription.chat_id,
+                               homework.render_status(record),
+                               urgent=is_urgent(record.status)):
+                tracker.commit(record)
+        return True
+
+    async def send(self, chat_id: str, message: str,
+                   urgent: bool = True) -> bool:
+        """Отправляет сообщение через очередь или напрямую.
+
+        Несрочные сообщения очередь может собрать в дайджест. Возвращает
+        True, если сообщение отправлено или принято в очередь.
+        """
+        if self.sender is not None:
+            return self.sender.submit(chat_id, message, urgent)
+        return await async_send_message(self.bot, chat_id, message)
+
+    def next_delay(self, subscription: Subscription, changed: bool) -> float:
+        """Задержка до следующего опроса подписки."""
+        if self.schedule is None:
+            return self.period
+        return self.schedule.next_delay(
+            subscription, self.statuses.get(subscription), changed
+        )
+
+    def status_board(self) -> StatusBoard:
+        """Ответы на команды чатов по трекерам подписок."""
+        board = StatusBoard(homework.HOMEWORK_VERDICTS)
+        for subscription, tracker in self.trackers.items():
+            board.register(subscription.chat_id, tracker)
+        return board
+
+    def max_cursor_lag(self) -> float:
+        """Наибольшее отставание курсора среди подписок."""
+        if not self.cursors:
+            return 0.0
+        return time.time() - min(self.cursors.values())
+
+    async def poll_and_reschedule(self, subscription: Subscription,
+                                  deadline: float) -> None:
+        """Опрос подписки и постановка следующего в колесо таймеров.
+
+        Следующий срок отсчитывается от прошлого срока, а не от конца
+        опроса, поэтому время запроса не сдвигает график подписки.
+        """
+        self.in_flight[subscription] = time.monotonic()
+        try:
+            changed = await self.poll(subscription)
+        finally:
+            del self.in_flight[subscription]
+        self.wheel.schedule(
+            subscription,
+            max(deadline + self.next_delay(subscription, changed),
+                self.wheel.clock())
+        )
+
+    def oldest_poll(self):
+        """Начало самого старого идущего опроса или None."""
+        return min(self.in_flight.values(), default=None)
+
+    async def dispatch(self) -> None:
+        """Запускает опросы подписок, чьи таймеры сработали."""
+        while True:
+            homework.HEALTH.beat()
+            if self.profiler is not None and self.profiler.check():
+                self.profiler.sample()
+            for subscription, deadline in self.wheel.advance():
+                task = asyncio.create_task(
+                    self.poll_and_reschedule(subscription, deadline)
+                )
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+            await asyncio.sleep(self.wheel.next_tick())
+
+    async def report_stats(self) -> None:
+        """Периодически пишет в лог счётчики соединений пула."""
+        while isinstance(self.session, SessionPool):
+            await asyncio.sleep(self.period)
+            logger.info('Соединения: %s', self.session.stats())
+            if self.sender is not None:
+                logger.info('Отправка: %s', self.sender.stats())
+
+    def stop(self) -> None:
+        """Запрашивает остановку: новые опросы больше не начинаются."""
+        if self.deadline is None:
+            self.deadline = time.monotonic() + self.shutdown_timeout
+        if self._stopping is not None and not self._stopping.is_set():
+            logger.info('Остановка, опросов в работе: %d', len(self.tasks))
+            self._stopping.set()
+
+    def remaining(self) -> float:
+        """Секунд до срока остановки; до stop() - весь shutdown_timeout."""
+        if self.deadline is None:
+            return self.shutdown_timeout
+        return max(self.deadline - time.monotonic(), 0)
+
+    async def drain(self, timeout: float = None) -> None:
+        """Дожидается начатых опросов, не дольше timeout секунд.
+
+        По умолчанию - не дольше срока остановки.
+        """
+        if not self.tasks:
+            return
+        if timeout is None:
+            timeout = self.remaining()
+        _, pending = await asyncio.wait(set(self.tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning('Опросы, не завершённые за %.0f с: %d',
+                           timeout, len(pending))
+
+    async def run(self, signals: tuple = ()) -> None:
+        """Опрашивает подписки до вызова stop() или сигнала из signals."""
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._stopping = asyncio.Event()
+        MAX_CURSOR_LAG.set_function(self.max_cursor_lag)
+        if self.sender is not None:
+            SEND_QUEUE_DEPTH.set_function(self.sender.pending)
+        loop = asyncio.get_running_loop()
+        for signum in signals:
+            loop.add_signal_handler(signum, self.stop)
+        executor = ThreadPoolExecutor(max_workers=self.concurrency,
+                                      thread_name_prefix=EXECUTOR_PREFIX)
+        loop.set_default_executor(executor)
+        # Первый опрос каждой подписки - в её стабильный момент периода,
+        # чтобы подписки, запущенные вместе, не опрашивались разом.
+        self.wheel = TimerWheel()
+        started = self.wheel.clock()
+        for subscription in self.subscriptions:
+            self.wheel.schedule(subscription, started + jitter_offset(
+                subscription.key, self.period
+            ))
+        logger.info('Запущен опрос подписок: %d', len(self.subscriptions))
+        workers = asyncio.gather(self.report_stats(), self.dispatch())
+        stopping = asyncio.create_task(self._stopping.wait())
+        await asyncio.wait((workers, stopping),
+                           return_when=asyncio.FIRST_COMPLETED)
+        if workers.done():
+            stopping.cancel()
+            workers.result()
+        workers.cancel()
+        # Отменённый gather дожидаемся, иначе asyncio сообщит
+        # о неполученном исключении при сборке мусора.
+        with contextlib.suppress(asyncio.CancelledError):
+            await workers
+        self.stop()
+        await self.drain()
+        await self.release_executor(executor)
+
+    async def release_executor(self, executor: ThreadPoolExecutor) -> None:
+        """Останавливает пул потоков, ожидая его до срока остановки.
+
+        asyncio.run ждёт пул по умолчанию без ограничения, поэтому пул
+        с потоками, не завершившимися к сроку, подменяется пустым.
+        """
+        waiter = threading.Thread(target=executor.shutdown, daemon=True,
+                                  kwargs={'cancel_futures': True})
+        waiter.start()
+        while waiter.is_alive() and self.remaining():
+            await asyncio.sleep(min(self.remaining(), 0.05))
+        if waiter.is_alive():
+            self.stragglers = sum(
+                thread.name.startswith(EXECUTOR_PREFIX)
+                for thread in threading.enumerate()
+            )
+            logger.warning('Потоки, не завершённые к сроку остановки: %d',
+                           self.stragglers)
+            asyncio.get_running_loop().set_default_executor(
+                ThreadPoolExecutor(max_workers=1)
+            )
+
+
+def serve(subscriptions: list, journal_path: str = JOURNAL_PATH,
+          webhook_port: int = WEBHOOK_PORT) -> None:
+    """Опрашивает подписки до остановки процесса."""
+    pool = SessionPool(pool_size=MAX_CONCURRENCY)
+    bot = pool.create_bot(homework.TELEGRAM_TOKEN)
+    pool.warm_up((homework.ENDPOINT,), bot)
+    journal = Journal(journal_path) if journal_path else None
+    sender = MessageSender(bot).start()
+    polling = None
+    try:
+        polling = PollingEngine(bot, subscriptions, session=pool,
+                                schedule=AdaptiveSchedule(), journal=journal,
+                                sender=sender, cache=ResponseCache(),
+                                breaker=CircuitBreaker(),
+                                profiler=Profiler().install())
+        # Диспетчер бьётся на каждом тике, даже если все опросы висят,
+        # поэтому зависание ловится и по возрасту старейшего опроса.
+        homework.HEALTH.watch(
+            WHEEL_TICK, polling.breaker, oldest=polling.oldest_poll,
+            work_limit=ITERATION_BUDGET, send=sender.pending,
+            polls=lambda: len(polling.tasks)
+        ).start_watchdog()
+        if webhook_port:
+            start_webhook_server(polling.status_board(), webhook_port)
+        asyncio.run(polling.run(signals=(signal.SIGTERM, signal.SIGINT)))
+    finally:
+        sender.close(SHUTDOWN_TIMEOUT if polling is None
+                     else polling.remaining())
+        pool.close()
+        if journal is not None:
+            journal.close()
+    if polling.stragglers:
+        # Интерпретатор при выходе дожидается всех потоков пула, а их
+        # зависшие запросы вывели бы остановку за срок.
+        logger.critical('Остановка не уложилась в %.0f с, выход',
+                        polling.shutdown_timeout)
+        if homework.RECORDER is not None:
+            homework.RECORDER.close()
+        logging.shutdown()
+        os._exit(EXIT_TIMEOUT)
+
+
+def check_config() -> list:
+    """Подписки для запуска; без токена бота или подписок - выход."""
+    if not homework.TELEGRAM_TOKEN:
+        logger.critical('Отсутствует токен: TELEGRAM_TOKEN. Бот остановлен!')
+        sys.exit(-1)
+    subscriptions = load_subscriptions()
+    if not subscriptions:
+        logger.critical('Нет ни одной подписки. Бот остановлен!')
+        sys.exit(-1)
+    return subscriptions
+
+
+def main():
+    """Запуск движка для всех подписок."""
+    serve(check_config())
+
+
+if __name__ == '__main__':
+    setup_logging(logging.INFO)
+    if RECORD_PATH:
+        homework.RECORDER = Recorder(RECORD_PATH)
+    if metrics.METRICS_PORT:
+        metrics.start_http_server(metrics.METRICS_PORT,
+                                  homework.HEALTH.routes())
+    main()
+    if homework.RECORDER is not None:
+        homework.RECORDER.close()
@@ -29,3 +29,15 @@ class CurrentDateError(NotForSend):
     """Ошибка с ключом current_date в ответе API."""
 
     pass
+
+
+class CircuitOpen(NotForSend):
+    """API недоступен, запрос не отправлялся."""
+
+    pass
+
+
+class DeadlineExceeded(NotForSend):
+    """Бюджет времени итерации опроса исчерпан."""
+
+    pass
@@ -0,0 +1,104 @@
+"""Быстрый путь для опросов, ответ на которые не изменился."""
+import hashlib
+import re
+from http import HTTPStatus
+from typing import NamedTuple
+
+import requests
+
+import homework
+import metrics
+from streaming import HomeworkStream, is_large
+
+CURRENT_DATE_PATTERN = re.compile(rb'"current_date"\s*:\s*(-?\d+)')
+
+FAST_PATH_POLLS = metrics.counter(
+    'homework_fast_path_polls',
+    'Опросы с неизменным ответом, обработанные без разбора JSON'
+)
+
+
+class PollResult(NamedTuple):
+    """Результат опроса: разобранный ответ или только новый курсор.
+
+    response равен None, если ответ не изменился с прошлого опроса
+    или слишком велик и отдан потоком stream.
+    current_date равен None, если API ответил 304 Not Modified.
+    """
+
+    response: dict
+    current_date: int = None
+    stream: HomeworkStream = None
+
+
+class ResponseCache:
+    """Отпечатки последних ответов API по подпискам.
+
+    current_date меняется в каждом ответе, поэтому отпечаток снимается
+    с тела без него: совпадение означает тот же список работ.
+    """
+
+    def __init__(self):
+        self.digests = {}
+        self.validators = {}
+
+    def conditional_headers(self, key) -> dict:
+        """Заголовки If-None-Match/If-Modified-Since для подписки."""
+        etag, last_modified = self.validators.get(key, (None, None))
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def remember_validators(self, key, response: requests.Response) -> None:
+        """Запоминает ETag и Last-Modified ответа, если они есть."""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            self.validators[key] = (etag, last_modified)
+
+    def unchanged_cursor(self, key, body: bytes):
+        """current_date из тела, если остальное тело не изменилось."""
+        match = CURRENT_DATE_PATTERN.search(body)
+        if match is None:
+            return None
+        digest = hashlib.blake2b(
+            body[:match.start()] + body[match.end():], digest_size=16
+        ).digest()
+        if self.digests.get(key) == digest:
+            return int(match.group(1))
+        self.digests[key] = digest
+        return None
+
+    def forget(self, key) -> None:
+        """Сбрасывает отпечаток, чтобы следующий ответ разобрался целиком."""
+        self.digests.pop(key, None)
+
+
+def fetch_if_changed(cache: ResponseCache, key, headers: dict,
+                     current_timestamp: int,
+                     session=requests, breaker=None) -> PollResult:
+    """Запрос к API, пропускающий разбор неизменившегося ответа.
+
+    Большой ответ не читается в память целиком, а отдаётся потоком.
+    """
+    response = homework.request_api(
+        {**headers, **cache.conditional_headers(key)}, current_timestamp,
+        session, expected=(HTTPStatus.OK, HTTPStatus.NOT_MODIFIED),
+        stream=True, breaker=breaker
+    )
+    if response.status_code == HTTPStatus.NOT_MODIFIED:
+        FAST_PATH_POLLS.inc()
+        response.close()
+        return PollResult(None)
+    cache.remember_validators(key, response)
+    if is_large(response):
+        cache.forget(key)
+        return PollResult(None, stream=HomeworkStream.from_response(response))
+    current_date = cache.unchanged_cursor(key, response.content)
+    if current_date is not None:
+        FAST_PATH_POLLS.inc()
+        return PollResult(None, current_date)
+    return PollResult(homework.decode_api_answer(response))
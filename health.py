@@ -0,0 +1,171 @@
+"""Проверки живости и готовности и сторожевой поток цикла опроса.
+
+Маршруты /healthz и /readyz подключаются к серверу метрик
+(metrics.start_http_server), отдельный порт не нужен. Ответ - JSON
+с временем с последнего успешного опроса, последней успешной отправки
+и последней завершённой итерации цикла, состоянием автомата защиты
+и глубиной очередей.
+
+/healthz отвечает 503, если цикл не завершал итерацию дольше
+WATCHDOG_FACTOR ожидаемых периодов или самая старая незавершённая
+работа (например, опрос в движке) идёт дольше WATCHDOG_FACTOR своих
+сроков: процесс жив, но опрос завис.
+/readyz отвечает 503 до первого успешного опроса и пока автомат защиты
+разомкнут. Сторожевой поток пишет стеки всех потоков в stderr при
+зависании, а с WATCHDOG_RESTART=1 ещё и завершает процесс, чтобы
+платформа или супервизор его перезапустили.
+"""
+import faulthandler
+import json
+import logging
+import os
+import threading
+import time
+from http import HTTPStatus
+
+import metrics
+from breaker import OPEN
+
+logger = logging.getLogger(__name__)
+
+WATCHDOG_FACTOR = float(os.getenv('WATCHDOG_FACTOR', 3))
+WATCHDOG_RESTART = int(os.getenv('WATCHDOG_RESTART', 0))
+WATCHDOG_INTERVAL = 5  # Секунды.
+EXIT_STALLED = 70  # Код выхода при перезапуске зависшего процесса.
+
+LOOP_STALLED = metrics.gauge(
+    'homework_loop_stalled', 'Цикл опроса не завершает итерации'
+)
+
+
+class Health:
+    """Отметки о работе цикла и ответы на проверки состояния."""
+
+    def __init__(self, factor: float = WATCHDOG_FACTOR,
+                 clock=time.monotonic):
+        self.factor = factor
+        self.clock = clock
+        self.period = None
+        self.breaker = None
+        self.queues = {}
+        self.oldest = None
+        self.work_limit = None
+        self.started = clock()
+        self.last_poll = self.last_send = self.last_iteration = None
+        self.stalled = False
+        self._watchdog = None
+
+    def poll_succeeded(self) -> None:
+        """Отмечает успешный опрос API."""
+        self.last_poll = self.clock()
+
+    def send_succeeded(self) -> None:
+        """Отмечает успешную отправку в telegram."""
+        self.last_send = self.clock()
+
+    def beat(self) -> None:
+        """Отмечает завершение итерации цикла."""
+        self.last_iteration = self.clock()
+
+    def watch(self, period: float, breaker=None, oldest=None,
+              work_limit: float = None, **queues) -> 'Health':
+        """Задаёт ожидаемый период цикла, автомат защиты и очереди.
+
+        oldest - функция без аргументов, возвращающая время по clock
+        начала самой старой незавершённой работы или None; work_limit -
+        ожидаемый срок такой работы (по умолчанию period). queues - имя
+        очереди -> функция без аргументов, возвращающая её глубину.
+        """
+        self.period = period
+        self.breaker = breaker
+        self.oldest = oldest
+        self.work_limit = period if work_limit is None else work_limit
+        self.queues.update(queues)
+        return self
+
+    def _oldest_age(self, now: float):
+        started = self.oldest() if self.oldest is not None else None
+        return None if started is None else now - started
+
+    def _since(self, moment: float, now: float):
+        return None if moment is None else round(now - moment, 3)
+
+    def is_stalled(self) -> bool:
+        """Цикл или самая старая работа отстают больше чем в factor раз."""
+        if self.period is None:
+            return False
+        now = self.clock()
+        last = self.last_iteration or self.started
+        if now - last > self.factor * self.period:
+            return True
+        age = self._oldest_age(now)
+        return age is not None and age > self.factor * self.work_limit
+
+    def report(self) -> dict:
+        """Состояние для ответа на проверки."""
+        now = self.clock()
+        return {
+            'stalled': self.is_stalled(),
+            'since_last_poll': self._since(self.last_poll, now),
+            'since_last_send': self._since(self.last_send, now),
+            'since_last_iteration': self._since(self.last_iteration, now),
+            'oldest_work': self._since(
+                self.oldest() if self.oldest else None, now
+            ),
+            'breaker': self.breaker.state if self.breaker else None,
+            'queues': {name: depth()
+                       for name, depth in self.queues.items()},
+        }
+
+    def _response(self, healthy: bool, report: dict) -> tuple:
+        return (HTTPStatus.OK if healthy else HTTPStatus.SERVICE_UNAVAILABLE,
+                'application/json',
+                json.dumps(report, ensure_ascii=False) + '\n')
+
+    def liveness_route(self) -> tuple:
+        """Обработчик /healthz."""
+        report = self.report()
+        return self._response(not report['stalled'], report)
+
+    def readiness_route(self) -> tuple:
+        """Обработчик /readyz."""
+        report = self.report()
+        return self._response(
+            report['since_last_poll'] is not None
+            and report['breaker'] != OPEN, report
+        )
+
+    def routes(self) -> dict:
+        """Маршруты для metrics.start_http_server."""
+        return {'/healthz': self.liveness_route,
+                '/readyz': self.readiness_route}
+
+    def check(self, restart: bool = WATCHDOG_RESTART) -> None:
+        """Одна проверка сторожевого потока."""
+        stalled = self.is_stalled()
+        LOOP_STALLED.set(int(stalled))
+        if stalled and not self.stalled:
+            report = self.report()
+            logger.critical('Цикл опроса завис: с последней итерации %s с, '
+                            'старейшая работа идёт %s с',
+                            report['since_last_iteration'],
+                            report['oldest_work'])
+            faulthandler.dump_traceback(all_threads=True)
+        elif self.stalled and not stalled:
+            logger.warning('Цикл опроса снова работает')
+        self.stalled = stalled
+        if stalled and restart:
+            logger.critical('Перезапуск зависшего процесса')
+            os._exit(EXIT_STALLED)
+
+    def start_watchdog(self, interval: float = WATCHDOG_INTERVAL,
+                       restart: bool = WATCHDOG_RESTART) -> None:
+        """Запускает сторожевой поток с проверкой раз в interval секунд."""
+        def run():
+            while True:
+                time.sleep(interval)
+                self.check(restart)
+
+        self._watchdog = threading.Thread(target=run, name='watchdog',
+                                          daemon=True)
+        self._watchdog.start()
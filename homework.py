@@ -1,18 +1,42 @@
 """Проект HOMEWORK Статус-БОТ."""
+from __future__ import annotations
+
 import os
 import sys
 import logging
 import time
+from contextlib import contextmanager
+from functools import partial
 from http import HTTPStatus
 
 from dotenv import load_dotenv
-import requests
-import telegram
 
+import metrics
+from alerts import ErrorAggregator
+from deadline import (
+    NETWORK_TIMEOUTS, TELEGRAM_CONNECT_TIMEOUT, TELEGRAM_READ_TIMEOUT,
+    Deadline, api_timeouts, check_budget, telegram_timeouts
+)
+from digest import DIGEST_WINDOW, is_urgent, pack
 from exceptions import (
-    NotForSend, WrongJSONDecode, EndPointIsNotAvailiable,
-    RequestError, CurrentDateError
+    WrongJSONDecode, EndPointIsNotAvailiable, RequestError, CurrentDateError
 )
+from health import Health
+from journal import JOURNAL_PATH, Journal
+from lazy_imports import lazy_import
+from logs import setup_logging
+from profiling import Profiler
+from recorder import RECORD_PATH, Recorder
+from records import Homework
+from shutdown import GracefulShutdown, ShutdownRequested
+from tracker import HomeworkTracker
+from validation import Quarantine, homework_validator
+from webhook import WEBHOOK_PORT, StatusBoard, start_webhook_server
+
+# requests и telegram загружаются при первом обращении: это заметная
+# часть времени старта, а telegram нужен только для отправки сообщений.
+requests = lazy_import('requests')
+telegram = lazy_import('telegram')
 
 load_dotenv()
 
@@ -26,6 +50,11 @@ TOKENS_REQRIED = ('PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID')
 RETRY_PERIOD = 600  # Секунды.
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+# Запись трафика (recorder.Recorder), включается переменной RECORD_PATH.
+RECORDER = None
+PROFILER = Profiler()
+SHUTDOWN = GracefulShutdown()
+HEALTH = Health()
 
 
 HOMEWORK_VERDICTS = {
@@ -33,6 +62,35 @@ HOMEWORK_VERDICTS = {
     'reviewing': 'Работа взята на проверку ревьюером.',
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
+# Проверка работ, скомпилированная из схемы, и карантин некорректных.
+VALIDATE_HOMEWORKS = homework_validator(HOMEWORK_VERDICTS)
+ITER_HOMEWORKS = homework_validator(HOMEWORK_VERDICTS, generator=True)
+QUARANTINE = Quarantine()
+
+API_LATENCY = metrics.histogram(
+    'homework_api_request_seconds', 'Длительность запроса к API Практикума'
+)
+SEND_LATENCY = metrics.histogram(
+    'homework_telegram_send_seconds', 'Длительность отправки в telegram'
+)
+LOOP_DURATION = metrics.histogram(
+    'homework_loop_iteration_seconds', 'Длительность итерации цикла опроса'
+)
+SLEEP_DRIFT = metrics.histogram(
+    'homework_sleep_drift_seconds',
+    'Отклонение фактической паузы между опросами от заданной',
+    buckets=(0.001, 0.01, 0.1, 1, 10, 60)
+)
+ERRORS = metrics.counter(
+    'homework_errors', 'Сбои цикла опроса по классу исключения',
+    ('exception',)
+)
+CURSOR_LAG = metrics.gauge(
+    'homework_cursor_lag_seconds', 'Отставание курсора current_date'
+)
+for exception_class in (EndPointIsNotAvailiable, RequestError,
+                        WrongJSONDecode, CurrentDateError):
+    ERRORS.labels(exception_class.__name__)
 
 
 def check_tokens() -> str:
@@ -45,43 +103,141 @@ def check_tokens() -> str:
     return tokens_str
 
 
-def send_message(bot: telegram.bot.Bot, message: str) -> None:
-    """Отправляет сообщение в telegram."""
+def configure_bot(bot: telegram.Bot) -> telegram.Bot:
+    """Подключает бота к Bot API с таймаутами из deadline.
+
+    Бот в main() создаётся вызовом telegram.Bot(token=TELEGRAM_TOKEN) с
+    Request по умолчанию, где таймаут соединения фиксирован в 5 с,
+    поэтому Request с TELEGRAM_CONNECT_TIMEOUT и TELEGRAM_READ_TIMEOUT
+    подставляется после создания.
+    """
+    bot._request = telegram.utils.request.Request(
+        connect_timeout=TELEGRAM_CONNECT_TIMEOUT,
+        read_timeout=TELEGRAM_READ_TIMEOUT
+    )
+    return bot
+
+
+def send_message(bot: telegram.bot.Bot, message: str) -> bool:
+    """Отправляет сообщение в telegram, возвращает успех отправки."""
+    return deliver_message(bot, TELEGRAM_CHAT_ID, message)
+
+
+def deliver_message(bot: telegram.bot.Bot, chat_id: str,
+                    message: str) -> bool:
+    """Отправляет сообщение в указанный чат telegram."""
+    _, read_timeout = telegram_timeouts()
+    started = time.perf_counter()
     try:
-        bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message)
+        with SEND_LATENCY.time():
+            bot.send_message(chat_id=chat_id, text=message,
+                             timeout=read_timeout)
     except telegram.TelegramError as error:
-        logger.error(f'Ошибка отправки статуса в telegram: {error}')
-    else:
-        logger.debug('Статус отправлен в telegram')
+        if isinstance(error, telegram.error.TimedOut):
+            NETWORK_TIMEOUTS.labels('telegram').inc()
+        if RECORDER is not None:
+            RECORDER.record_send(chat_id, message,
+                                 time.perf_counter() - started, error)
+        logger.error('Ошибка отправки статуса в telegram: %s', error)
+        return False
+    if RECORDER is not None:
+        RECORDER.record_send(chat_id, message, time.perf_counter() - started)
+    HEALTH.send_succeeded()
+    logger.debug('Статус отправлен в telegram')
+    return True
+
+
+def notify(bot: telegram.Bot, messages: list) -> None:
+    """Отправляет сообщения об ошибках, пропуская пустые."""
+    for message in messages:
+        if message:
+            send_message(bot, message)
 
 
 def get_api_answer(current_timestamp: int) -> dict:
     """Отправляем запрос к API и получаем список домашних работ."""
+    return fetch_api_answer(HEADERS, current_timestamp)
+
+
+def fetch_api_answer(headers: dict, current_timestamp: int,
+                     session=requests, breaker=None) -> dict:
+    """Запрос к API с заголовками конкретного пользователя."""
+    return decode_api_answer(
+        request_api(headers, current_timestamp, session, breaker=breaker)
+    )
+
+
+def observe_api_call(breaker, headers: dict, params: dict, started: float,
+                     response=None, error: Exception = None,
+                     stream: bool = False) -> None:
+    """Учитывает запрос к API в circuit breaker и записи трафика."""
+    if RECORDER is not None:
+        RECORDER.record_api(headers, params, response,
+                            time.perf_counter() - started, error, stream)
+    if breaker is None:
+        return
+    if (error is not None
+            or response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR):
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+
+def request_api(headers: dict, current_timestamp: int, session=requests,
+                expected: tuple = (HTTPStatus.OK,),
+                stream: bool = False, breaker=None) -> requests.Response:
+    """Отправляет запрос к API и проверяет код ответа.
+
+    Если передан breaker (breaker.CircuitBreaker), сетевые ошибки и
+    ответы 5xx учитываются как сбои API, а при открытом предохранителе
+    запрос не отправляется.
+    """
     params_request = {
         'url': ENDPOINT,
-        'headers': HEADERS,
+        'headers': headers,
         'params': {'from_date': current_timestamp},
+        'timeout': api_timeouts(),
     }
+    if stream:
+        params_request['stream'] = True
+    if breaker is not None:
+        breaker.before_call()
+    started = time.perf_counter()
     try:
-        response = requests.get(**params_request)
-        if response.status_code != HTTPStatus.OK:
-            raise EndPointIsNotAvailiable(
-                f'Ответ от API не 200. '
-                f'Код ответа: {response.status_code}. '
-                f'Причина: {response.reason}. '
-                f'Текст: {response.text}.'
-            )
-        return response.json()
-    except requests.JSONDecodeError as error:
-        message = f"Ошибка декодирования JSON: {error}"
-        raise WrongJSONDecode(message, error)
+        with API_LATENCY.time():
+            response = session.get(**params_request)
     except requests.RequestException as error:
+        if isinstance(error, requests.Timeout):
+            NETWORK_TIMEOUTS.labels('api').inc()
+        observe_api_call(breaker, headers, params_request['params'], started,
+                         error=error)
         message = f'Произошла ошибка при запросе к API: {error}'
         raise RequestError(message, error)
+    observe_api_call(breaker, headers, params_request['params'], started,
+                     response, stream=stream)
+    if response.status_code not in expected:
+        raise EndPointIsNotAvailiable(
+            f'Ответ от API не 200. '
+            f'Код ответа: {response.status_code}. '
+            f'Причина: {response.reason}. '
+            f'Текст: {response.text}.'
+        )
+    return response
+
+
+def decode_api_answer(response: requests.Response) -> dict:
+    """Декодирует JSON из ответа API."""
+    try:
+        return response.json()
+    # requests.JSONDecodeError появился только в 2.27 и наследует ValueError.
+    except ValueError as error:
+        message = f"Ошибка декодирования JSON: {error}"
+        raise WrongJSONDecode(message, error)
 
 
 def check_response(response: dict) -> list:
     """Проверяет ответ API на корректность."""
+    check_budget('validate')
     if not isinstance(response, dict):
         raise TypeError('Ответ API не является dict')
     if 'homeworks' not in response:
@@ -100,70 +256,191 @@ def check_response(response: dict) -> list:
 
 def parse_status(homework: dict) -> str:
     """Извлекает и проверяет статус работы."""
-    if 'homework_name' not in homework:
-        raise KeyError('Нет ключа homework_name в ответе от API')
-    homework_name = homework.get('homework_name')
-    homework_status = homework.get('status')
-    if homework_status not in HOMEWORK_VERDICTS:
-        raise ValueError(f'Неизвестный статус - {homework_status}')
+    return render_status(build_record(homework))
+
+
+def build_record(homework: dict) -> Homework:
+    """Проверяет работу из ответа API и строит компактную запись."""
+    return Homework.from_dict(homework, HOMEWORK_VERDICTS)
+
+
+def build_records(homeworks) -> list:
+    """Записи для корректных работ из ответа API.
+
+    Все работы проверяются за один проход скомпилированной схемой,
+    некорректные откладываются в QUARANTINE и не мешают остальным.
+    """
+    records, invalid = VALIDATE_HOMEWORKS(homeworks)
+    if invalid:
+        QUARANTINE.add(invalid)
+    return records
+
+
+def iter_records(homeworks):
+    """Записи для корректных работ по одной, по мере чтения homeworks.
+
+    Для потокового ответа: в памяти не копятся все записи сразу.
+    Некорректные работы откладываются в QUARANTINE в конце прохода.
+    """
+    invalid = []
+    try:
+        yield from ITER_HOMEWORKS(homeworks, invalid)
+    finally:
+        if invalid:
+            QUARANTINE.add(invalid)
+
+
+def render_status(record: Homework) -> str:
+    """Текст сообщения об изменении статуса работы."""
     return ('Изменился статус проверки работы "{homework_name}". {verdict}'
-            ).format(homework_name=homework_name,
-                     verdict=HOMEWORK_VERDICTS[homework_status]
+            ).format(homework_name=record.name,
+                     verdict=HOMEWORK_VERDICTS[record.status]
                      )
 
 
+def process_homeworks(bot: telegram.bot.Bot, tracker: HomeworkTracker,
+                      homeworks: list) -> None:
+    """Отправляет сообщения о каждом изменившемся статусе работ."""
+    changed = tracker.diff(build_records(homeworks)) if homeworks else []
+    if not changed:
+        logger.info('Нет новых статусов')
+    # API отдаёт свежие работы первыми, а сообщения нужны по порядку.
+    changed.reverse()
+    if DIGEST_WINDOW:
+        send_digest(bot, tracker, changed)
+        return
+    # Переход отмечается (и пишется в журнал) только после отправки:
+    # неотправленный уйдёт при следующем опросе.
+    for record in changed:
+        if send_message(bot, render_status(record)):
+            tracker.commit(record)
+
+
+def send_digest(bot: telegram.bot.Bot, tracker: HomeworkTracker,
+                records: list) -> None:
+    """Отправляет переходы одного опроса дайджестом.
+
+    Срочные переходы (digest.DIGEST_URGENT) уходят отдельными
+    сообщениями, остальные - одним сообщением в пределах лимита
+    telegram. Запись отмечается в трекере после успешной отправки
+    сообщения, в котором она закончилась.
+    """
+    batch = []
+    for record in records:
+        if is_urgent(record.status):
+            if send_message(bot, render_status(record)):
+                tracker.commit(record)
+        else:
+            batch.append(record)
+    for text, count in pack([render_status(record) for record in batch]):
+        if send_message(bot, text):
+            for record in batch[:count]:
+                tracker.commit(record)
+        del batch[:count]
+
+
+def restore_state(journal: Journal, subscription_key: str) -> tuple:
+    """Курсор и трекер работ, восстановленные из журнала."""
+    if journal is None:
+        return int(time.time()), HomeworkTracker()
+    cursor, statuses = journal.restore(subscription_key)
+    names, history = journal.restore_details(subscription_key)
+    tracker = HomeworkTracker(
+        statuses, on_commit=partial(journal.record_status, subscription_key),
+        names=names, history=history
+    )
+    return cursor or int(time.time()), tracker
+
+
+def poll_iteration(bot: telegram.bot.Bot, tracker: HomeworkTracker,
+                   journal: Journal, alerts: ErrorAggregator,
+                   current_timestamp: int, session=requests) -> int:
+    """Одна итерация цикла опроса для main() и slim.main().
+
+    Запрашивает API через session, отправляет изменившиеся статусы и
+    сообщения о сбоях, записывает курсор в журнал и метрики итерации.
+    Возвращает новый курсор, а при сбое - прежний.
+    """
+    iteration_started = time.monotonic()
+    try:
+        with PROFILER.iteration(), Deadline():
+            response = fetch_api_answer(HEADERS, current_timestamp, session)
+            homeworks = check_response(response)
+            process_homeworks(bot, tracker, homeworks)
+        current_timestamp = response['current_date']
+        if journal is not None:
+            journal.record_cursor(TELEGRAM_CHAT_ID, current_timestamp)
+
+    except Exception as error:
+        ERRORS.labels(type(error).__name__).inc()
+        logger.error('Сбой в работе программы: %s', error, exc_info=True)
+        notify(bot, [alerts.report(error)])
+
+    else:
+        HEALTH.poll_succeeded()
+        notify(bot, alerts.resolve())
+
+    finally:
+        notify(bot, alerts.summaries())
+        LOOP_DURATION.observe(time.monotonic() - iteration_started)
+        CURSOR_LAG.set_function(lambda: time.time() - current_timestamp)
+        HEALTH.beat()
+    return current_timestamp
+
+
+@contextmanager
+def pause(seconds: float):
+    """Пауза между опросами: прерывается остановкой, пишет SLEEP_DRIFT.
+
+    Сам вызов time.sleep остаётся в цикле, чтобы каждый цикл выбирал
+    свою длительность паузы.
+    """
+    started = time.monotonic()
+    with SHUTDOWN.interruptible():
+        yield
+    SLEEP_DRIFT.observe(abs(time.monotonic() - started - seconds))
+
+
 def main():
     """Основной цикл работы бота."""
     tokens_errors = check_tokens()
     if tokens_errors:
         logger.critical(
-            f'Отсутствует токен: {tokens_errors}. '
-            f'Бот остановлен!'
+            'Отсутствует токен: %s. Бот остановлен!', tokens_errors
         )
         sys.exit(-1)
     bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    current_timestamp = int(time.time())
-    prev_message = ''
+    configure_bot(bot)
+    journal = Journal(JOURNAL_PATH) if JOURNAL_PATH else None
+    current_timestamp, tracker = restore_state(journal, TELEGRAM_CHAT_ID)
+    alerts = ErrorAggregator()
+    if WEBHOOK_PORT:
+        board = StatusBoard(HOMEWORK_VERDICTS)
+        board.register(TELEGRAM_CHAT_ID, tracker)
+        start_webhook_server(board)
 
-    while True:
-        try:
-            response = get_api_answer(current_timestamp)
-            homeworks = check_response(response)
-            if homeworks:
-                message = parse_status(homeworks[0])
-            else:
-                message = 'Нет новых статусов'
-            if message != prev_message:
-                send_message(bot, message)
-                prev_message = message
-            else:
-                logger.info(message)
-            current_timestamp = response['current_date']
-
-        except NotForSend as error:
-            message = f'Сбой в работе программы: {error}'
-            logger.error(message, exc_info=True)
-
-        except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            send_message(bot, message)
-            logger.error(message, exc_info=True)
-
-        finally:
-            time.sleep(RETRY_PERIOD)
+    try:
+        while not SHUTDOWN.requested:
+            current_timestamp = poll_iteration(bot, tracker, journal, alerts,
+                                               current_timestamp)
+            with pause(RETRY_PERIOD):
+                time.sleep(RETRY_PERIOD)
+    except ShutdownRequested:
+        logger.debug('Пауза между опросами прервана')
+    if journal is not None:
+        journal.close()
+    logger.info('Бот остановлен')
 
 
 if __name__ == '__main__':
-    current_working_directory = os.getcwd()
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format=(
-            '%(asctime)s, %(levelname)s, Путь - %(pathname)s, '
-            'Файл - %(filename)s, Функция - %(funcName)s, '
-            'Номер строки - %(lineno)d, %(message)s'
-        ),
-        handlers=[logging.FileHandler(f'{current_working_directory}log.log',
-                                      encoding='UTF-8'
-                                      ),
-                  logging.StreamHandler(sys.stdout)])
+    setup_logging()
+    PROFILER.install()
+    SHUTDOWN.install()
+    if RECORD_PATH:
+        RECORDER = Recorder(RECORD_PATH)
+    if metrics.METRICS_PORT:
+        metrics.start_http_server(metrics.METRICS_PORT, HEALTH.routes())
+    HEALTH.watch(RETRY_PERIOD).start_watchdog()
     main()
+    if RECORDER is not None:
+        RECORDER.close()
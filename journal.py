@@ -0,0 +1,204 @@
+"""Журнал курсора и статусов работ, переживающий перезапуск бота."""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from tracker import HISTORY_SIZE
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_PATH = os.getenv('JOURNAL_PATH')
+JOURNAL_FSYNC_BATCH = int(os.getenv('JOURNAL_FSYNC_BATCH', 64))
+JOURNAL_FSYNC_INTERVAL = float(os.getenv('JOURNAL_FSYNC_INTERVAL', 1.0))
+# Журнал сжимается, когда записей в нём во столько раз больше живых.
+COMPACT_RATIO = 4
+COMPACT_MIN_RECORDS = 1024
+
+
+class Journal:
+    """Append-only журнал в формате JSON lines.
+
+    Каждая строка - либо курсор подписки {"s": ..., "c": current_date},
+    либо статус работы {"s": ..., "h": ключ работы, "st": статус,
+    "n": название, "u": время перехода}. Строка с "u" - переход статуса,
+    последние history_size переходов подписки хранятся для /history;
+    строка без "u" - снимок статуса, её пишет сжатие журнала. "n" и "u"
+    необязательны: в старых журналах их нет. Строки пишутся сразу, fsync
+    выполняется пачками. При старте журнал проигрывается целиком, при
+    разрастании - переписывается снимком.
+    """
+
+    def __init__(self, path: str, fsync_batch: int = JOURNAL_FSYNC_BATCH,
+                 fsync_interval: float = JOURNAL_FSYNC_INTERVAL,
+                 history_size: int = HISTORY_SIZE):
+        self.path = path
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+        self.history_size = history_size
+        self.cursors = {}
+        self.statuses = {}
+        self.names = {}
+        # Подписка -> последние переходы (время, ключ, название, статус).
+        self.history = {}
+        self._records = 0
+        self._live = 0
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+        torn_tail = self._load()
+        self._file = open(path, 'a', encoding='UTF-8')
+        if torn_tail:
+            self._file.write('\n')
+
+    def _apply(self, record: dict) -> None:
+        subscription_key = record['s']
+        if 'c' in record:
+            if subscription_key not in self.cursors:
+                self._live += 1
+            self.cursors[subscription_key] = record['c']
+            return
+        homework_key = record['h']
+        statuses = self.statuses.setdefault(subscription_key, {})
+        if homework_key not in statuses:
+            self._live += 1
+        statuses[homework_key] = record['st']
+        if 'n' in record:
+            self.names.setdefault(subscription_key, {})[homework_key] = (
+                record['n']
+            )
+        if 'u' in record:
+            history = self.history.get(subscription_key)
+            if history is None:
+                history = self.history[subscription_key] = deque(
+                    maxlen=self.history_size
+                )
+            elif len(history) == history.maxlen:
+                self._live -= 1
+            history.append((record['u'], homework_key,
+                            record.get('n', homework_key), record['st']))
+            self._live += 1
+
+    def _load(self) -> bool:
+        """Проигрывает журнал, возвращает True при оборванной строке."""
+        line = '\n'
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, encoding='UTF-8') as file:
+            for line in file:
+                try:
+                    self._apply(json.loads(line))
+                except (ValueError, KeyError):
+                    # Недописанная при падении строка.
+                    logger.warning('Пропущена битая запись журнала: %r', line)
+                    continue
+                self._records += 1
+        return not line.endswith('\n')
+
+    def restore(self, subscription_key: str) -> tuple:
+        """Курсор (или None) и статусы работ подписки."""
+        return (self.cursors.get(subscription_key),
+                dict(self.statuses.get(subscription_key, {})))
+
+    def restore_details(self, subscription_key: str) -> tuple:
+        """Названия работ подписки и её последние переходы.
+
+        Переходы - список (время, название, статус), старые первыми.
+        """
+        return (dict(self.names.get(subscription_key, {})),
+                [(updated, name, status) for updated, _, name, status
+                 in self.history.get(subscription_key, ())])
+
+    def record_cursor(self, subscription_key: str,
+                      current_date: int) -> None:
+        """Сохраняет курсор current_date подписки."""
+        if self.cursors.get(subscription_key) != current_date:
+            self._append({'s': subscription_key, 'c': current_date})
+
+    def record_status(self, subscription_key: str, homework_key,
+                      status: str, name: str = None,
+                      updated: int = None) -> None:
+        """Сохраняет последний статус работы.
+
+        С updated запись считается переходом и попадает в историю.
+        """
+        record = {'s': subscription_key, 'h': homework_key, 'st': status}
+        if name is not None:
+            record['n'] = name
+        if updated is not None:
+            record['u'] = updated
+        self._append(record)
+
+    def _append(self, record: dict) -> None:
+        with self._lock:
+            self._apply(record)
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._file.flush()
+            self._records += 1
+            self._pending += 1
+            if (self._pending >= self.fsync_batch
+                    or time.monotonic() - self._last_sync
+                    >= self.fsync_interval):
+                self._sync()
+            if self._records > max(COMPACT_MIN_RECORDS,
+                                   COMPACT_RATIO * self._live):
+                self._compact()
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def _compact(self) -> None:
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='UTF-8') as file:
+            for subscription_key, cursor in self.cursors.items():
+                file.write(json.dumps({'s': subscription_key, 'c': cursor},
+                                      ensure_ascii=False) + '\n')
+            for subscription_key in self.statuses:
+                file.writelines(self._snapshot(subscription_key))
+            file.flush()
+            os.fsync(file.fileno())
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, 'a', encoding='UTF-8')
+        self._records = self._live
+        self._pending = 0
+        logger.debug('Журнал сжат до %d записей', self._live)
+
+    def _snapshot(self, subscription_key: str):
+        """Строки снимка подписки: переходы истории, затем статусы.
+
+        Снимки статусов идут последними, поэтому при проигрывании они
+        перекрывают статусы из старых переходов истории.
+        """
+        for updated, homework_key, name, status in self.history.get(
+                subscription_key, ()):
+            yield json.dumps({'s': subscription_key, 'h': homework_key,
+                              'st': status, 'n': name, 'u': updated},
+                             ensure_ascii=False) + '\n'
+        names = self.names.get(subscription_key, {})
+        for homework_key, status in self.statuses[subscription_key].items():
+            record = {'s': subscription_key, 'h': homework_key, 'st': status}
+            if homework_key in names:
+                record['n'] = names[homework_key]
+            yield json.dumps(record, ensure_ascii=False) + '\n'
+
+    def sync(self) -> None:
+        """Принудительно сбрасывает журнал на диск."""
+        with self._lock:
+            self._sync()
+
+    def compact(self) -> None:
+        """Переписывает журнал снимком текущего состояния."""
+        with self._lock:
+            self._compact()
+
+    def close(self) -> None:
+        """Сбрасывает журнал на диск и закрывает файл."""
+        with self._lock:
+            self._sync()
+            self._file.close()
@@ -0,0 +1,22 @@
+"""Отложенный импорт тяжёлых зависимостей."""
+import importlib.util
+import sys
+
+
+def lazy_import(name: str):
+    """Модуль, который загрузится при первом обращении к его атрибуту.
+
+    Если модуль уже импортирован, возвращается он сам.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f'No module named {name!r}', name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
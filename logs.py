@@ -0,0 +1,144 @@
+"""Неблокирующая запись логов.
+
+Обработчики вызывающего потока только кладут запись в очередь, а запись
+на диск и в stdout выполняет поток logging.handlers.QueueListener.
+Одинаковые сообщения подряд сворачиваются в одну запись
+«повторилось N раз», файл лога ротируется по размеру или по времени.
+
+Настройки окружения:
+    LOG_FILE - путь к файлу лога, пустая строка отключает файл;
+    LOG_LEVEL - уровень логирования;
+    LOG_MAX_BYTES, LOG_BACKUP_COUNT - ротация по размеру;
+    LOG_ROTATE_WHEN - ротация по времени (например, midnight),
+        если задана, LOG_MAX_BYTES не используется;
+    LOG_REPEAT_INTERVAL - как часто, в секундах, отчитываться о
+        повторах одного и того же сообщения.
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+
+LOG_FILE = os.getenv('LOG_FILE', os.path.join(os.getcwd(), 'log.log'))
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 5))
+LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN', '')
+LOG_REPEAT_INTERVAL = float(os.getenv('LOG_REPEAT_INTERVAL', 3600))
+LOG_FORMAT = '%(asctime)s, %(levelname)s, %(name)s, %(message)s'
+
+
+class CollapsingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, сворачивающий одинаковые сообщения подряд.
+
+    Сообщения сравниваются по логгеру, уровню, шаблону и аргументам,
+    поэтому для сворачивания их нужно логировать в %-стиле. Повтор
+    не попадает в очередь; вместо повторов пишется одна запись
+    «повторилось N раз» - перед следующим другим сообщением или раз
+    в interval секунд, если сообщение повторяется без перерыва.
+    """
+
+    def __init__(self, log_queue, interval: float = LOG_REPEAT_INTERVAL,
+                 clock=time.monotonic):
+        super().__init__(log_queue)
+        self.interval = interval
+        self.clock = clock
+        self.last_key = None
+        self.last_record = None
+        self.repeats = 0
+        self.window_started = 0.0
+
+    def _summary(self) -> logging.LogRecord:
+        record = self.last_record
+        summary = logging.LogRecord(
+            record.name, record.levelno, record.pathname, record.lineno,
+            'Сообщение повторилось ещё %d раз: %s',
+            (self.repeats, record.getMessage()), None, record.funcName,
+        )
+        self.repeats = 0
+        self.window_started = self.clock()
+        return summary
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Кладёт запись в очередь, если это не повтор предыдущей."""
+        try:
+            key = (record.name, record.levelno, record.msg,
+                   repr(record.args), record.exc_info is None)
+        except Exception:
+            key = None
+        if key is not None and key == self.last_key:
+            self.repeats += 1
+            if self.clock() - self.window_started >= self.interval:
+                super().emit(self._summary())
+            return
+        if self.repeats:
+            super().emit(self._summary())
+        self.last_key = key
+        self.last_record = record
+        self.window_started = self.clock()
+        super().emit(record)
+
+    def flush(self) -> None:
+        """Отчитывается о накопленных повторах."""
+        self.acquire()
+        try:
+            if self.repeats:
+                super().emit(self._summary())
+        finally:
+            self.release()
+
+
+def file_handler(path: str, max_bytes: int = LOG_MAX_BYTES,
+                 backup_count: int = LOG_BACKUP_COUNT,
+                 when: str = LOG_ROTATE_WHEN) -> logging.Handler:
+    """Файловый обработчик с ротацией по времени или по размеру."""
+    if when:
+        return logging.handlers.TimedRotatingFileHandler(
+            path, when=when, backupCount=backup_count, encoding='UTF-8'
+        )
+    return logging.handlers.RotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backup_count, encoding='UTF-8'
+    )
+
+
+def setup_logging(level=LOG_LEVEL, path: str = LOG_FILE,
+                  fmt: str = LOG_FORMAT,
+                  interval: float = LOG_REPEAT_INTERVAL
+                  ) -> logging.handlers.QueueListener:
+    """Настраивает корневой логгер на запись через очередь.
+
+    Возвращает запущенный QueueListener; он останавливается при выходе
+    из процесса, дописывая оставшиеся в очереди записи.
+    """
+    # Эти поля записи в формате не используются.
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    formatter = logging.Formatter(fmt)
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if path:
+        handlers.append(file_handler(path))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    log_queue = queue.SimpleQueue()
+    queue_handler = CollapsingQueueHandler(log_queue, interval)
+    listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    # В очередь попадает только текст сообщения, остальное дописывают
+    # обработчики в потоке QueueListener.
+    logging.basicConfig(level=level, format='%(message)s',
+                        handlers=[queue_handler], force=True)
+    listener.start()
+
+    def stop():
+        queue_handler.flush()
+        listener.stop()
+        for handler in handlers:
+            handler.close()
+
+    atexit.register(stop)
+    return listener
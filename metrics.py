@@ -0,0 +1,305 @@
+"""Метрики в формате Prometheus и HTTP-эндпоинт /metrics."""
+import abc
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+                   30, 60, math.inf)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value))
+
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\')
+                         .replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in zip(names, values)
+    )
+    return f'{{{pairs}}}'
+
+
+class Metric(abc.ABC):
+    """Общая часть метрик: имя, описание, метки и дочерние серии."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """Новая серия метрики."""
+
+    def labels(self, *values):
+        """Серия метрики для конкретных значений меток."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f'Метрика {self.name} ожидает метки '
+                             f'{self.labelnames}')
+        values = tuple(str(value) for value in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def samples(self):
+        """Строки (суффикс, имена меток, значения меток, значение)."""
+        for values, child in list(self._children.items()):
+            for suffix, names, extra, value in child.samples():
+                yield (suffix, self.labelnames + names, values + extra,
+                       value)
+
+    def expose(self) -> str:
+        """Текст метрики в формате Prometheus."""
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} {self.kind}']
+        for suffix, names, values, value in self.samples():
+            lines.append(f'{self.name}{suffix}'
+                         f'{_format_labels(names, values)} '
+                         f'{_format_value(value)}')
+        return '\n'.join(lines)
+
+    def __getattr__(self, attribute):
+        # Метрика без меток ведёт себя как её единственная серия.
+        if attribute.startswith('_') or self.labelnames:
+            raise AttributeError(attribute)
+        return getattr(self.labels(), attribute)
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def samples(self):
+        yield '_total', (), (), self.value
+
+
+class Counter(Metric):
+    """Монотонно растущий счётчик."""
+
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+
+class _GaugeChild:
+    def __init__(self):
+        self.value = 0.0
+        self.function = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def set_function(self, function) -> None:
+        """Значение вычисляется в момент сбора метрик."""
+        self.function = function
+
+    def samples(self):
+        yield '', (), (), self.function() if self.function else self.value
+
+
+class Gauge(Metric):
+    """Произвольное текущее значение."""
+
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+
+class _HistogramChild:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.sum += value
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[index] += 1
+                    break
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def samples(self):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield '_bucket', ('le',), (_format_value(bound),), cumulative
+        yield '_sum', (), (), self.sum
+        yield '_count', (), (), cumulative
+
+
+class Histogram(Metric):
+    """Распределение значений по корзинам."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        if self.buckets[-1] != math.inf:
+            self.buckets += (math.inf,)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+
+class Registry:
+    """Набор метрик процесса."""
+
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = metric_class(name, *args,
+                                                           **kwargs)
+            elif not isinstance(metric, metric_class):
+                raise ValueError(f'Метрика {name} уже зарегистрирована '
+                                 f'с другим типом')
+            return metric
+
+    def counter(self, name: str, documentation: str,
+                labelnames: tuple = ()) -> Counter:
+        """Регистрирует или возвращает счётчик."""
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str,
+              labelnames: tuple = ()) -> Gauge:
+        """Регистрирует или возвращает gauge."""
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str,
+                  labelnames: tuple = (),
+                  buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        """Регистрирует или возвращает гистограмму."""
+        return self._register(Histogram, name, documentation, labelnames,
+                              buckets)
+
+    def expose(self) -> str:
+        """Все метрики в формате Prometheus."""
+        return '\n'.join(metric.expose()
+                         for metric in list(self.metrics.values())) + '\n'
+
+
+def merge_expositions(expositions: dict, label: str = 'worker') -> str:
+    """Выдача нескольких процессов одним текстом.
+
+    expositions - {значение метки: текст Registry.expose()}. Каждая
+    серия получает метку label, серии одной метрики идут подряд под
+    общими HELP и TYPE, как того требует формат Prometheus. Серии
+    текста с ключом None (метрики самого процесса) метку не получают.
+    """
+    families = {}
+    for worker, text in expositions.items():
+        extra = (None if worker is None
+                 else _format_labels((label,), (worker,))[1:-1])
+        family = None
+        for line in text.splitlines():
+            if line.startswith('# '):
+                name = line.split(' ', 3)[2]
+                family = families.setdefault(name, ([], []))
+                if len(family[0]) < 2:
+                    family[0].append(line)
+            elif line and family is not None and extra is None:
+                family[1].append(line)
+            elif line and family is not None:
+                series, value = line.rsplit(' ', 1)
+                if series.endswith('}'):
+                    series = f'{series[:-1]},{extra}}}'
+                else:
+                    series = f'{series}{{{extra}}}'
+                family[1].append(f'{series} {value}')
+    return ''.join('\n'.join(header + samples) + '\n'
+                   for header, samples in families.values())
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        route = self.server.routes.get(self.path.split('?', 1)[0])
+        if route is None:
+            status, content_type, body = (HTTPStatus.NOT_FOUND,
+                                          'text/plain', 'Not found\n')
+        else:
+            status, content_type, body = route()
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def metrics_route(registry: Registry = REGISTRY):
+    """Обработчик /metrics для start_http_server."""
+    return lambda: (HTTPStatus.OK, CONTENT_TYPE, registry.expose())
+
+
+def start_http_server(port: int = METRICS_PORT, routes: dict = None,
+                      host: str = '0.0.0.0') -> ThreadingHTTPServer:
+    """Запускает HTTP-сервер метрик в фоновом потоке.
+
+    routes дополняет /metrics другими путями: путь -> функция без
+    аргументов, возвращающая (код ответа, Content-Type, тело).
+    """
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.routes = {'/metrics': metrics_route()}
+    server.routes.update(routes or {})
+    threading.Thread(target=server.serve_forever, name='metrics',
+                     daemon=True).start()
+    logger.info('Метрики доступны на порту %d', server.server_address[1])
+    return server
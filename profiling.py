@@ -0,0 +1,164 @@
+"""Профилирование работающего бота без перезапуска.
+
+SIGUSR1 или появление файла PROFILE_TRIGGER включает профилирование:
+в цикле main() - cProfile на следующие PROFILE_ITERATIONS итераций, в
+движке - семплирование стеков всех потоков на PROFILE_SECONDS секунд.
+SIGUSR2 пишет стеки всех потоков в PROFILE_DIR/stacks-<pid>.txt.
+Результаты и время этапов конвейера (STAGES) пишутся в PROFILE_DIR
+и в лог. Пока профилирование выключено, итерация цикла платит только
+за проверку флага и наличия файла.
+"""
+import cProfile
+import faulthandler
+import io
+import logging
+import os
+import pstats
+import signal
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.getenv('PROFILE_DIR', tempfile.gettempdir())
+PROFILE_TRIGGER = os.getenv(
+    'PROFILE_TRIGGER', os.path.join(PROFILE_DIR, 'homework-profile')
+)
+PROFILE_ITERATIONS = int(os.getenv('PROFILE_ITERATIONS', 10))
+PROFILE_SECONDS = float(os.getenv('PROFILE_SECONDS', 30))
+SAMPLE_INTERVAL = 0.005  # Секунды.
+
+# Этапы конвейера, время которых выводится отдельно.
+STAGES = ('get_api_answer', 'request_api', 'decode_api_answer',
+          'check_response', 'parse_status', 'build_record', 'render_status',
+          'send_message', 'deliver_message')
+
+
+def stage_timings(stats: pstats.Stats) -> dict:
+    """Вызовы и суммарное время этапов из статистики cProfile."""
+    timings = {}
+    for (_, _, name), (_, calls, _, cumulative, _) in stats.stats.items():
+        if name in STAGES:
+            timing = timings.setdefault(name, {'calls': 0, 'seconds': 0.0})
+            timing['calls'] += calls
+            timing['seconds'] = round(timing['seconds'] + cumulative, 6)
+    return timings
+
+
+class Profiler:
+    """Профилирование по запросу для цикла и для движка."""
+
+    def __init__(self, iterations: int = PROFILE_ITERATIONS,
+                 seconds: float = PROFILE_SECONDS,
+                 directory: str = PROFILE_DIR,
+                 trigger: str = PROFILE_TRIGGER):
+        self.iterations = iterations
+        self.seconds = seconds
+        self.directory = directory
+        self.trigger = trigger
+        self.requested = False
+        self.profile = None
+        self.remaining = 0
+        self.sampler = None
+
+    def install(self) -> 'Profiler':
+        """Назначает SIGUSR1 и SIGUSR2; вызывать из главного потока."""
+        signal.signal(signal.SIGUSR1, self._on_signal)
+        stacks = open(os.path.join(self.directory,
+                                   f'stacks-{os.getpid()}.txt'), 'a')
+        faulthandler.register(signal.SIGUSR2, file=stacks, all_threads=True)
+        return self
+
+    def _on_signal(self, signum, frame) -> None:
+        self.requested = True
+
+    def check(self) -> bool:
+        """Запрошено ли профилирование; файл-триггер удаляется."""
+        if self.trigger and os.path.exists(self.trigger):
+            try:
+                os.remove(self.trigger)
+            except OSError:
+                pass
+            self.requested = True
+        requested, self.requested = self.requested, False
+        return requested
+
+    def _path(self, kind: str, suffix: str) -> str:
+        return os.path.join(
+            self.directory,
+            f'{kind}-{os.getpid()}-{time.strftime("%Y%m%d-%H%M%S")}{suffix}'
+        )
+
+    @contextmanager
+    def iteration(self):
+        """Оборачивает итерацию цикла; профилирует, если запрошено."""
+        if self.profile is None and self.check():
+            self.profile = cProfile.Profile()
+            self.remaining = self.iterations
+            logger.info('Профилирование следующих %d итераций',
+                        self.iterations)
+        if self.profile is None:
+            yield
+            return
+        self.profile.enable()
+        try:
+            yield
+        finally:
+            self.profile.disable()
+            self.remaining -= 1
+            if self.remaining <= 0:
+                self.dump()
+
+    def dump(self) -> str:
+        """Сохраняет собранный профиль и возвращает путь к нему."""
+        profile, self.profile = self.profile, None
+        path = self._path('profile', '.prof')
+        profile.dump_stats(path)
+        report = io.StringIO()
+        stats = pstats.Stats(profile, stream=report)
+        stats.sort_stats('cumulative').print_stats(30)
+        with open(f'{path}.txt', 'w', encoding='UTF-8') as file:
+            file.write(report.getvalue())
+        logger.info('Профиль сохранён в %s, этапы: %s', path,
+                    stage_timings(stats))
+        return path
+
+    def sample(self, seconds: float = None) -> None:
+        """Запускает семплирование стеков всех потоков в фоне."""
+        if self.sampler is not None and self.sampler.is_alive():
+            return
+        self.sampler = threading.Thread(
+            target=self._sample, name='profiler', daemon=True,
+            args=(seconds or self.seconds,)
+        )
+        self.sampler.start()
+
+    def _sample(self, seconds: float) -> None:
+        stacks = Counter()
+        stages = Counter()
+        own = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        logger.info('Семплирование стеков на %s с', seconds)
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                names = []
+                while frame is not None:
+                    names.append(frame.f_code.co_name)
+                    frame = frame.f_back
+                stacks[';'.join(reversed(names))] += 1
+                stages.update(set(names).intersection(STAGES))
+            time.sleep(SAMPLE_INTERVAL)
+        path = self._path('stacks', '.folded')
+        with open(path, 'w', encoding='UTF-8') as file:
+            for stack, count in stacks.most_common():
+                file.write(f'{stack} {count}\n')
+        logger.info('Стеки сохранены в %s, этапы, с: %s', path, {
+            name: round(count * SAMPLE_INTERVAL, 3)
+            for name, count in stages.items()
+        })
@@ -0,0 +1,111 @@
+"""Запись ответов API и вызовов telegram для последующего воспроизведения.
+
+Режим включается переменной RECORD_PATH: каждая строка файла - JSON
+одной записи, файл только дописывается (с расширением .gz - сжатый).
+Записи:
+    {"k": "start", "ts": unix-время} - начало сессии записи;
+    {"k": "api", "t": с от начала сессии, "a": отпечаток токена,
+     "from": from_date, "st": код, "h": заголовки, "b": тело,
+     "l": задержка} или с "e": класс исключения вместо ответа;
+     большое тело, запрошенное потоком, не читается: вместо "b" - "s": true;
+    {"k": "tg", "t": ..., "c": чат, "m": текст, "l": задержка,
+     "e": класс исключения или null}.
+Воспроизведение - replay.py.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+RECORD_PATH = os.getenv('RECORD_PATH', '')
+# Потоковые ответы больше этого размера (или без Content-Length)
+# записываются без тела, чтобы запись не читала их в память целиком.
+RECORD_BODY_LIMIT = int(os.getenv('RECORD_BODY_LIMIT', 256 * 1024))
+
+
+def token_fingerprint(headers: dict) -> str:
+    """Отпечаток заголовка Authorization: сам токен не записывается."""
+    return hashlib.blake2b(
+        str(headers.get('Authorization', '')).encode(), digest_size=6
+    ).hexdigest()
+
+
+def fits_record(response) -> bool:
+    """Можно ли записать тело ответа, не читая лишнего в память."""
+    length = response.headers.get('Content-Length')
+    return length is not None and int(length) <= RECORD_BODY_LIMIT
+
+
+def open_recording(path: str, mode: str = 'r'):
+    """Открывает файл записи, .gz - через gzip."""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='UTF-8')
+    return open(path, mode, encoding='UTF-8')
+
+
+class Recorder:
+    """Потокобезопасная запись трафика в append-only файл."""
+
+    def __init__(self, path: str = RECORD_PATH, clock=time.monotonic):
+        self.path = path
+        self.clock = clock
+        self.started = clock()
+        self._lock = threading.Lock()
+        self._file = open_recording(path, 'a')
+        self._write({'k': 'start', 'ts': round(time.time(), 3)})
+
+    def _write(self, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False,
+                          separators=(',', ':')) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def _elapsed(self) -> float:
+        return round(self.clock() - self.started, 4)
+
+    def record_api(self, headers: dict, params: dict, response=None,
+                   latency: float = 0.0, error: Exception = None,
+                   stream: bool = False) -> None:
+        """Записывает ответ API или исключение запроса.
+
+        Тело потокового ответа (stream) записывается, только если оно
+        не больше RECORD_BODY_LIMIT.
+        """
+        record = {'k': 'api', 't': self._elapsed(),
+                  'a': token_fingerprint(headers),
+                  'from': params.get('from_date'), 'l': round(latency, 4)}
+        if error is not None:
+            record['e'] = type(error).__name__
+        else:
+            record.update(st=response.status_code,
+                          h=dict(response.headers))
+            if stream and not fits_record(response):
+                record['s'] = True
+            else:
+                record['b'] = response.text
+        self._write(record)
+
+    def record_send(self, chat_id, message: str, latency: float = 0.0,
+                    error: Exception = None) -> None:
+        """Записывает вызов send_message."""
+        self._write({'k': 'tg', 't': self._elapsed(), 'c': chat_id,
+                     'm': message, 'l': round(latency, 4),
+                     'e': type(error).__name__ if error else None})
+
+    def close(self) -> None:
+        """Закрывает файл записи."""
+        with self._lock:
+            self._file.close()
+
+
+def load_recording(path: str):
+    """Записи из файла по одной; недописанная строка пропускается."""
+    with open_recording(path) as file:
+        for line in file:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
@@ -0,0 +1,78 @@
+"""Компактная запись о домашней работе."""
+import sys
+from datetime import datetime
+
+
+# С Python 3.11 fromisoformat сам разбирает суффикс Z.
+_ISO_ZULU = sys.version_info >= (3, 11)
+
+
+def parse_timestamp(value) -> int:
+    """Unix-время из date_updated вида 2020-02-13T14:40:57Z, иначе 0."""
+    if not isinstance(value, str):
+        return 0
+    try:
+        return int(datetime.fromisoformat(
+            value if _ISO_ZULU else value.replace('Z', '+00:00')
+        ).timestamp())
+    except ValueError:
+        return 0
+
+
+class Homework:
+    """Проверенная запись о работе.
+
+    Хранит только нужные поля: ключ (id или название), название, статус
+    (интернированная строка из HOMEWORK_VERDICTS) и время обновления.
+    Благодаря __slots__ запись занимает в разы меньше памяти, чем
+    исходный dict из ответа API.
+    """
+
+    __slots__ = ('key', 'name', 'status', '_updated')
+
+    def __init__(self, key, name: str, status: str, updated=0):
+        self.key = key
+        self.name = name
+        self.status = status
+        self._updated = updated
+
+    @property
+    def updated(self) -> int:
+        """Unix-время обновления.
+
+        Строка date_updated из ответа API разбирается при первом
+        обращении: время нужно только для переходов статуса, а их
+        в ответе обычно единицы.
+        """
+        updated = self._updated
+        if updated.__class__ is not int:
+            updated = self._updated = parse_timestamp(updated)
+        return updated
+
+    @classmethod
+    def from_dict(cls, data: dict, verdicts: dict) -> 'Homework':
+        """Проверяет запись из ответа API за один проход по полям.
+
+        Ошибки те же, что у parse_status.
+        """
+        if not isinstance(data, dict):
+            raise TypeError('Работа в ответе API не является dict')
+        name = data.get('homework_name')
+        if name is None:
+            raise KeyError('Нет ключа homework_name в ответе от API')
+        status = data.get('status')
+        if status not in verdicts:
+            raise ValueError(f'Неизвестный статус - {status}')
+        key = data.get('id')
+        return cls(name if key is None else key, name, sys.intern(status),
+                   data.get('date_updated'))
+
+    def __eq__(self, other):
+        if not isinstance(other, Homework):
+            return NotImplemented
+        return (self.key, self.name, self.status, self.updated) == (
+            other.key, other.name, other.status, other.updated)
+
+    def __repr__(self):
+        return (f'Homework(key={self.key!r}, name={self.name!r}, '
+                f'status={self.status!r}, updated={self.updated})')
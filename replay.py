@@ -0,0 +1,117 @@
+"""Воспроизведение записанного трафика через конвейер бота.
+
+Ответы API из файла RECORD_PATH проходят через decode_api_answer,
+check_response и process_homeworks (разбор статусов и путь отправки),
+с исходными паузами между ответами, ускоренными в speed раз, или без
+пауз при speed 0. Вместо telegram сообщения получает ReplayBot, а
+результат сравнивается с записанными вызовами telegram.
+
+Пример: python replay.py session.jsonl.gz --speed 0
+"""
+import argparse
+import json
+import time
+from collections import Counter
+
+import requests
+
+import homework
+from recorder import load_recording
+from tracker import HomeworkTracker
+
+
+class ReplayBot:
+    """Бот, запоминающий сообщения и имитирующий задержку отправки."""
+
+    def __init__(self, latencies: list = (), speed: float = 0):
+        self.latencies = list(latencies)
+        self.speed = speed
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        """Запоминает сообщение."""
+        if self.speed and len(self.sent) < len(self.latencies):
+            time.sleep(self.latencies[len(self.sent)] / self.speed)
+        self.sent.append(text)
+
+
+def build_response(record: dict) -> requests.Response:
+    """requests.Response из записи ответа API."""
+    response = requests.Response()
+    response.status_code = record['st']
+    response.headers.update(record.get('h') or {})
+    response._content = record['b'].encode('utf-8')
+    response._content_consumed = True
+    response.encoding = 'utf-8'
+    return response
+
+
+def replay(path: str, speed: float = 0) -> dict:
+    """Прогоняет запись и возвращает отчёт."""
+    records = list(load_recording(path))
+    recorded = [record for record in records if record['k'] == 'tg']
+    bot = ReplayBot([record['l'] for record in recorded], speed)
+    trackers = {}
+    errors = Counter()
+    stage = Counter()
+    responses = streamed = 0
+    session_started = replay_started = time.perf_counter()
+    for record in records:
+        if record['k'] == 'start':
+            session_started = time.perf_counter()
+            continue
+        if record['k'] != 'api':
+            continue
+        if speed:
+            delay = session_started + record['t'] / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        if 'e' in record:
+            errors[record['e']] += 1
+            continue
+        if record.get('s'):
+            # Тело большого потокового ответа не записывалось.
+            streamed += 1
+            continue
+        responses += 1
+        tracker = trackers.setdefault(record['a'], HomeworkTracker())
+        started = time.perf_counter()
+        try:
+            response = homework.decode_api_answer(build_response(record))
+            homeworks = homework.check_response(response)
+            stage['check_s'] += time.perf_counter() - started
+            started = time.perf_counter()
+            homework.process_homeworks(bot, tracker, homeworks)
+            stage['process_s'] += time.perf_counter() - started
+        except Exception as error:
+            errors[type(error).__name__] += 1
+    expected = Counter(record['m'] for record in recorded
+                       if record['e'] is None)
+    actual = Counter(bot.sent)
+    return {
+        'api_responses': responses,
+        'streamed_skipped': streamed,
+        'errors': dict(errors),
+        'messages_sent': len(bot.sent),
+        'messages_recorded': len(recorded),
+        'missing': list((expected - actual).elements())[:10],
+        'unexpected': list((actual - expected).elements())[:10],
+        'elapsed_s': round(time.perf_counter() - replay_started, 4),
+        **{key: round(value, 4) for key, value in stage.items()},
+    }
+
+
+def main(argv: list = None) -> dict:
+    """Разбирает аргументы и печатает отчёт о воспроизведении."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', help='файл записи RECORD_PATH')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='ускорение; 0 - без пауз')
+    args = parser.parse_args(argv)
+    report = replay(args.path, args.speed)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Планирование опросов API для подписок."""
+import hashlib
+import math
+import os
+import time
+
+from homework import RETRY_PERIOD
+
+MIN_POLL_PERIOD = int(os.getenv('MIN_POLL_PERIOD', 60))
+MAX_POLL_PERIOD = int(os.getenv('MAX_POLL_PERIOD', 6 * 3600))
+BACKOFF_FACTOR = float(os.getenv('BACKOFF_FACTOR', 1.5))
+MAX_IDLE_POLLS = 64
+WHEEL_TICK = float(os.getenv('WHEEL_TICK', 1.0))
+WHEEL_SLOTS = 4096
+
+# Базовый период и потолок периода для последнего известного статуса.
+STATUS_PERIODS = {
+    'reviewing': (MIN_POLL_PERIOD, RETRY_PERIOD),
+    'rejected': (RETRY_PERIOD, MAX_POLL_PERIOD),
+    'approved': (2 * RETRY_PERIOD, MAX_POLL_PERIOD),
+    None: (RETRY_PERIOD, MAX_POLL_PERIOD),
+}
+
+
+class AdaptiveSchedule:
+    """Выбирает период следующего опроса по статусу и активности.
+
+    Пока работа на ревью, опрос идёт часто. Каждый опрос без изменений
+    увеличивает период в backoff раз, любое изменение сбрасывает его
+    к базовому значению для статуса.
+    """
+
+    def __init__(self, min_period: float = MIN_POLL_PERIOD,
+                 max_period: float = MAX_POLL_PERIOD,
+                 backoff: float = BACKOFF_FACTOR):
+        self.min_period = min_period
+        self.max_period = max_period
+        self.backoff = backoff
+        self.idle_polls = {}
+
+    def next_delay(self, key, status: str = None,
+                   changed: bool = False) -> float:
+        """Задержка до следующего опроса подписки key."""
+        if changed:
+            self.idle_polls[key] = 0
+        else:
+            self.idle_polls[key] = min(self.idle_polls.get(key, -1) + 1,
+                                       MAX_IDLE_POLLS)
+        base, ceiling = STATUS_PERIODS.get(status, STATUS_PERIODS[None])
+        delay = min(base * self.backoff ** self.idle_polls[key], ceiling)
+        return max(self.min_period, min(delay, self.max_period))
+
+    def forget(self, key) -> None:
+        """Удаляет состояние подписки."""
+        self.idle_polls.pop(key, None)
+
+
+def jitter_offset(key, period: float) -> float:
+    """Стабильное смещение подписки внутри периода, от 0 до period.
+
+    Смещение зависит только от ключа, поэтому после перезапуска
+    подписка попадает в тот же момент периода, а подписки в целом
+    распределяются по периоду равномерно.
+    """
+    digest = hashlib.blake2b(str(key).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') / 2 ** 64 * period
+
+
+class TimerWheel:
+    """Хешированное колесо таймеров на монотонных часах.
+
+    Время делится на тики по tick секунд, тик попадает в ячейку
+    номер_тика % slots. Постановка и перенос таймера - O(1), за один
+    тик просматривается одна ячейка. Срок таймера хранится точно, а
+    не округлённым до тика, поэтому следующий срок отсчитывается от
+    предыдущего срока, а не от момента опроса, и период не уплывает.
+    """
+
+    def __init__(self, tick: float = WHEEL_TICK, slots: int = WHEEL_SLOTS,
+                 clock=time.monotonic):
+        self.tick = tick
+        self.clock = clock
+        self.origin = clock()
+        self.current = 0
+        self.slots = [dict() for _ in range(slots)]
+        # Ключ -> (номер тика, срок).
+        self.timers = {}
+
+    def __len__(self):
+        return len(self.timers)
+
+    def schedule(self, key, deadline: float) -> None:
+        """Ставит или переносит таймер key на момент deadline."""
+        self.cancel(key)
+        tick = max(math.ceil((deadline - self.origin) / self.tick),
+                   self.current + 1)
+        self.timers[key] = (tick, deadline)
+        self.slots[tick % len(self.slots)][key] = tick
+
+    def cancel(self, key) -> None:
+        """Снимает таймер key, если он есть."""
+        timer = self.timers.pop(key, None)
+        if timer is not None:
+            del self.slots[timer[0] % len(self.slots)][key]
+
+    def advance(self) -> list:
+        """Сработавшие к текущему моменту таймеры: [(ключ, срок)]."""
+        now_tick = math.floor((self.clock() - self.origin) / self.tick)
+        expired = []
+        while self.current < now_tick:
+            self.current += 1
+            slot = self.slots[self.current % len(self.slots)]
+            for key in [key for key, tick in slot.items()
+                        if tick <= self.current]:
+                del slot[key]
+                expired.append((key, self.timers.pop(key)[1]))
+        return expired
+
+    def next_tick(self) -> float:
+        """Через сколько секунд наступит следующий тик."""
+        return max(self.origin + (self.current + 1) * self.tick
+                   - self.clock(), 0)
@@ -0,0 +1,230 @@
+"""Очередь исходящих сообщений telegram с ограничением скорости."""
+import heapq
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import telegram
+
+import homework
+from digest import DIGEST_WINDOW, DigestBuffer
+from homework import SEND_LATENCY
+
+logger = logging.getLogger(__name__)
+
+# Лимиты Bot API: около 1 сообщения в секунду в чат и 30 в секунду всего.
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+SEND_QUEUE_SIZE = int(os.getenv('SEND_QUEUE_SIZE', 10000))
+THROUGHPUT_WINDOW = 60  # Секунды.
+
+
+class TokenBucket:
+    """Token bucket, резервирующий слоты заранее.
+
+    reserve() всегда забирает токен и возвращает, сколько нужно подождать
+    до его появления, поэтому порядок резервирований сохраняется.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1,
+                 clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity,
+                          self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Забирает токен и возвращает задержку в секундах."""
+        self._refill()
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0
+        return -self.tokens / self.rate
+
+    def penalize(self, seconds: float) -> None:
+        """Запрещает отправку на seconds секунд (ответ RetryAfter)."""
+        self._refill()
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class MessageSender:
+    """Отдельный поток, отправляющий сообщения из очереди.
+
+    submit() не блокирует вызывающий поток или корутину. Сообщение,
+    которое нельзя отправить из-за лимита чата, откладывается, не
+    задерживая сообщения в другие чаты. С digest (DigestBuffer)
+    несрочные сообщения копятся и уходят одним сообщением на чат.
+    """
+
+    def __init__(self, bot: telegram.Bot,
+                 chat_rate: float = TELEGRAM_CHAT_RATE,
+                 global_rate: float = TELEGRAM_GLOBAL_RATE,
+                 maxsize: int = SEND_QUEUE_SIZE,
+                 digest_window: float = DIGEST_WINDOW):
+        self.bot = bot
+        self.digest = DigestBuffer(digest_window) if digest_window else None
+        self.chat_rate = chat_rate
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.global_bucket = TokenBucket(global_rate, capacity=global_rate)
+        self.chat_buckets = {}
+        self.delayed = []
+        self._sequence = itertools.count()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sender',
+                                        daemon=True)
+        self.started = None
+        self.sent = self.failed = self.retried = self.dropped = 0
+        self.recent = deque()
+
+    def start(self) -> 'MessageSender':
+        """Запускает поток отправки."""
+        self.started = time.monotonic()
+        self._thread.start()
+        return self
+
+    def submit(self, chat_id: str, message: str,
+               urgent: bool = True) -> bool:
+        """Ставит сообщение в очередь, не дожидаясь отправки.
+
+        Несрочное сообщение (urgent=False) может попасть в дайджест.
+        """
+        try:
+            self.queue.put_nowait((chat_id, message, urgent))
+        except queue.Full:
+            self.dropped += 1
+            logger.error('Очередь отправки переполнена, сообщение в чат '
+                         '%s отброшено', chat_id)
+            return False
+        return True
+
+    def _bucket(self, chat_id: str) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.chat_rate)
+        return bucket
+
+    def _accept(self, chat_id: str, message: str, urgent: bool) -> None:
+        if self.digest is None or urgent:
+            self._enqueue((chat_id, message))
+        else:
+            self.digest.add(chat_id, message)
+
+    def _enqueue(self, item: tuple) -> None:
+        self._schedule(item, self._bucket(item[0]).reserve())
+
+    def _schedule(self, item: tuple, delay: float) -> None:
+        heapq.heappush(self.delayed, (time.monotonic() + delay,
+                                      next(self._sequence), item))
+
+    def _postpone(self, item: tuple, delay: float) -> None:
+        """Откладывает сообщения чата item после ответа RetryAfter.
+
+        Уже запланированные сообщения чата переносятся за сообщение
+        item с прежним порядком, чтобы не уйти во время запрета.
+        """
+        chat_id = item[0]
+        bucket = self._bucket(chat_id)
+        bucket.penalize(delay)
+        later = sorted(entry for entry in self.delayed
+                       if entry[2][0] == chat_id)
+        if later:
+            self.delayed = [entry for entry in self.delayed
+                            if entry[2][0] != chat_id]
+            heapq.heapify(self.delayed)
+        self._schedule(item, delay)
+        for _, _, pending in later:
+            self._schedule(pending, bucket.reserve())
+
+    def _send(self, item: tuple) -> None:
+        chat_id, message = item
+        time.sleep(self.global_bucket.reserve())
+        started = time.perf_counter()
+        try:
+            with SEND_LATENCY.time():
+                self.bot.send_message(chat_id=chat_id, text=message)
+        except telegram.error.RetryAfter as error:
+            self._record(item, started, error)
+            self.retried += 1
+            logger.warning('Лимит telegram для чата %s, повтор через %s с',
+                           chat_id, error.retry_after)
+            self._postpone(item, error.retry_after)
+        except telegram.TelegramError as error:
+            self._record(item, started, error)
+            self.failed += 1
+            logger.error('Ошибка отправки статуса в telegram: %s', error)
+        else:
+            self._record(item, started)
+            homework.HEALTH.send_succeeded()
+            self.sent += 1
+            now = time.monotonic()
+            self.recent.append(now)
+            while self.recent[0] < now - THROUGHPUT_WINDOW:
+                self.recent.popleft()
+            logger.debug('Статус отправлен в telegram')
+
+    @staticmethod
+    def _record(item: tuple, started: float, error=None) -> None:
+        if homework.RECORDER is not None:
+            homework.RECORDER.record_send(
+                *item, time.perf_counter() - started, error
+            )
+
+    def _next_timeout(self) -> float:
+        timeout = 0.5
+        if self.delayed:
+            timeout = max(self.delayed[0][0] - time.monotonic(), 0)
+        if self.digest is not None and self.digest.chats:
+            timeout = min(timeout, self.digest.next_due())
+        return timeout
+
+    def _run(self) -> None:
+        while not (self._stopping.is_set() and self.pending() == 0):
+            try:
+                self._accept(*self.queue.get(timeout=self._next_timeout()))
+            except queue.Empty:
+                pass
+            if self.digest is not None:
+                # При остановке дайджесты отправляются, не дожидаясь окна,
+                # когда в них попала вся очередь.
+                flush = self._stopping.is_set() and self.queue.empty()
+                for item in self.digest.due(force=flush):
+                    self._enqueue(item)
+            while self.delayed and self.delayed[0][0] <= time.monotonic():
+                self._send(heapq.heappop(self.delayed)[2])
+
+    def pending(self) -> int:
+        """Сообщения, ожидающие отправки."""
+        digested = len(self.digest) if self.digest is not None else 0
+        return self.queue.qsize() + len(self.delayed) + digested
+
+    def stats(self) -> dict:
+        """Счётчики и пропускная способность отправки."""
+        now = time.monotonic()
+        recent = sum(1 for sent_at in list(self.recent)
+                     if sent_at >= now - THROUGHPUT_WINDOW)
+        uptime = now - self.started if self.started else 0
+        return {
+            'sent': self.sent,
+            'failed': self.failed,
+            'retried': self.retried,
+            'dropped': self.dropped,
+            'pending': self.pending(),
+            'throughput': self.sent / uptime if uptime else 0.0,
+            'recent_throughput': recent / THROUGHPUT_WINDOW,
+        }
+
+    def close(self, timeout: float = None) -> None:
+        """Дожидается отправки очереди и останавливает поток."""
+        self._stopping.set()
+        self._thread.join(timeout)
@@ -0,0 +1,93 @@
+"""Пул keep-alive соединений для API Практикума и telegram."""
+import logging
+import os
+
+import requests
+import telegram
+from requests.adapters import HTTPAdapter
+from telegram.utils.request import Request
+
+from deadline import (
+    TELEGRAM_CONNECT_TIMEOUT, TELEGRAM_READ_TIMEOUT, api_timeouts
+)
+
+logger = logging.getLogger(__name__)
+
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 32))
+TELEGRAM_API_URL = 'https://api.telegram.org/'
+
+
+def _pool_counters(pool_manager) -> tuple:
+    """Суммирует счётчики соединений по всем пулам urllib3."""
+    created = requests_sent = 0
+    pools = pool_manager.pools
+    for key in list(pools.keys()):
+        try:
+            pool = pools[key]
+        except KeyError:
+            continue
+        created += pool.num_connections
+        requests_sent += pool.num_requests
+    return created, requests_sent
+
+
+class SessionPool:
+    """Общие HTTP-сессии, переиспользуемые между итерациями и подписками.
+
+    Соединения держатся открытыми (keep-alive), поэтому TLS-рукопожатие
+    выполняется один раз на соединение, а не на каждый запрос.
+    """
+
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE):
+        self.pool_size = pool_size
+        self.adapter = HTTPAdapter(pool_maxsize=pool_size, pool_block=True)
+        self.session = requests.Session()
+        self.session.headers['Connection'] = 'keep-alive'
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+        self.telegram_request = Request(
+            con_pool_size=pool_size, connect_timeout=TELEGRAM_CONNECT_TIMEOUT,
+            read_timeout=TELEGRAM_READ_TIMEOUT
+        )
+
+    def get(self, **kwargs) -> requests.Response:
+        """GET-запрос через общий пул соединений."""
+        return self.session.get(**kwargs)
+
+    def create_bot(self, token: str, **kwargs) -> telegram.Bot:
+        """Бот telegram, работающий через общий пул соединений."""
+        return telegram.Bot(token=token, request=self.telegram_request,
+                            **kwargs)
+
+    def warm_up(self, urls: tuple, bot: telegram.Bot = None) -> None:
+        """Заранее открывает соединения, чтобы первый опрос был быстрым."""
+        for url in urls:
+            try:
+                self.session.head(url, timeout=api_timeouts())
+            except requests.RequestException as error:
+                logger.warning('Не удалось прогреть соединение %s: %s',
+                               url, error)
+        if bot is not None:
+            try:
+                bot.get_me()
+            except telegram.TelegramError as error:
+                logger.warning('Не удалось прогреть соединение с telegram: '
+                               '%s', error)
+
+    def stats(self) -> dict:
+        """Счётчики новых и переиспользованных соединений."""
+        api_created, api_requests = _pool_counters(self.adapter.poolmanager)
+        tg_created, tg_requests = _pool_counters(
+            self.telegram_request._con_pool
+        )
+        return {
+            'api_connections_new': api_created,
+            'api_connections_reused': max(api_requests - api_created, 0),
+            'telegram_connections_new': tg_created,
+            'telegram_connections_reused': max(tg_requests - tg_created, 0),
+        }
+
+    def close(self) -> None:
+        """Закрывает все соединения пула."""
+        self.session.close()
+        self.telegram_request.stop()
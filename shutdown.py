@@ -0,0 +1,85 @@
+"""Корректная остановка по SIGTERM и SIGINT.
+
+Сигнал во время паузы между опросами прерывает её сразу исключением
+ShutdownRequested, сигнал во время опроса даёт итерации закончиться:
+сообщения отправляются, курсор записывается в журнал, после чего цикл
+завершается. Если остановка не уложилась в SHUTDOWN_TIMEOUT секунд,
+SIGALRM поднимает SystemExit, и процесс выходит, выполнив finally-блоки
+и обработчики atexit.
+Повторный сигнал завершает процесс так же, не дожидаясь срока.
+"""
+import logging
+import math
+import os
+import signal
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', 20))
+EXIT_TIMEOUT = 1  # Код выхода, если остановка не уложилась в срок.
+
+
+class ShutdownRequested(BaseException):
+    """Прерывает паузу между опросами.
+
+    Наследуется от BaseException, чтобы его не перехватил
+    `except Exception` цикла опроса.
+    """
+
+
+class GracefulShutdown:
+    """Флаг остановки и прерываемая пауза для цикла опроса."""
+
+    def __init__(self, timeout: float = SHUTDOWN_TIMEOUT,
+                 signals: tuple = (signal.SIGTERM, signal.SIGINT)):
+        self.timeout = timeout
+        self.signals = signals
+        self.requested = False
+        self.sleeping = False
+
+    def install(self) -> 'GracefulShutdown':
+        """Назначает обработчики сигналов; вызывать из главного потока."""
+        for signum in self.signals:
+            signal.signal(signum, self._on_signal)
+        signal.signal(signal.SIGALRM, self._on_timeout)
+        return self
+
+    def request(self) -> None:
+        """Запрашивает остановку и запускает отсчёт срока."""
+        if self.requested:
+            return
+        self.requested = True
+        if self.timeout:
+            signal.alarm(math.ceil(self.timeout))
+
+    def _on_signal(self, signum, frame) -> None:
+        if self.requested:
+            logger.warning('Повторный сигнал %s, выход без ожидания',
+                           signal.Signals(signum).name)
+            raise SystemExit(EXIT_TIMEOUT)
+        logger.info('Получен сигнал %s, остановка',
+                    signal.Signals(signum).name)
+        self.request()
+        if self.sleeping:
+            raise ShutdownRequested
+
+    def _on_timeout(self, signum, frame) -> None:
+        logger.critical('Остановка не уложилась в %.0f с, выход',
+                        self.timeout)
+        raise SystemExit(EXIT_TIMEOUT)
+
+    @contextmanager
+    def interruptible(self):
+        """Блок, который запрос остановки прерывает ShutdownRequested.
+
+        Если остановка уже запрошена, исключение поднимается сразу,
+        не выполняя блок.
+        """
+        self.sleeping = True
+        try:
+            if self.requested:
+                raise ShutdownRequested
+            yield
+        finally:
+            self.sleeping = False
@@ -0,0 +1,259 @@
+"""Облегчённый режим бота: быстрый старт без requests и telegram.
+
+Запросы к API Практикума и Bot API идут через http.client с keep-alive,
+а requests и python-telegram-bot загружаются, только если понадобятся
+их классы исключений. Запуск: python slim.py,
+отчёт о времени импорта: python slim.py --importtime [модуль].
+"""
+import time
+
+PROCESS_STARTED = time.monotonic()
+
+import http.client  # noqa: E402
+import json  # noqa: E402
+import logging  # noqa: E402
+import re  # noqa: E402
+import subprocess  # noqa: E402
+import sys  # noqa: E402
+from urllib.parse import urlencode, urlsplit  # noqa: E402
+
+import homework  # noqa: E402
+import metrics  # noqa: E402
+from alerts import ErrorAggregator  # noqa: E402
+from deadline import telegram_timeouts  # noqa: E402
+from exceptions import RequestError  # noqa: E402
+from journal import JOURNAL_PATH, Journal  # noqa: E402
+from logs import setup_logging  # noqa: E402
+from recorder import RECORD_PATH, Recorder  # noqa: E402
+from shutdown import ShutdownRequested  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_API_URL = 'https://api.telegram.org/bot'
+SLIM_TIMEOUT = 30  # Секунды.
+IMPORT_TIME_PATTERN = re.compile(
+    r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)'
+)
+
+STARTUP_SECONDS = metrics.gauge(
+    'homework_startup_seconds',
+    'Время от начала импорта до завершения первого опроса'
+)
+
+
+class SlimResponse:
+    """Ответ с тем же интерфейсом, что нужен коду из requests.Response."""
+
+    def __init__(self, status: int, reason: str, headers, body: bytes):
+        self.status_code = status
+        self.reason = reason
+        self.headers = headers
+        self.content = body
+
+    @property
+    def text(self) -> str:
+        """Тело ответа строкой."""
+        return self.content.decode('utf-8', 'replace')
+
+    def json(self):
+        """Тело ответа как JSON, ValueError при ошибке."""
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size: int = 1):
+        """Тело ответа кусками."""
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self) -> None:
+        """Тело уже прочитано, соединение свободно."""
+
+
+class SlimSession:
+    """Минимальный HTTP-клиент с одним keep-alive соединением на хост."""
+
+    def __init__(self, timeout: float = SLIM_TIMEOUT):
+        self.timeout = timeout
+        self.connections = {}
+
+    def _connection(self, scheme: str, netloc: str):
+        connection = self.connections.get((scheme, netloc))
+        if connection is None:
+            connection_class = (http.client.HTTPSConnection
+                                if scheme == 'https'
+                                else http.client.HTTPConnection)
+            connection = connection_class(netloc, timeout=self.timeout)
+            self.connections[(scheme, netloc)] = connection
+        return connection
+
+    def request(self, method: str, url: str, headers: dict = None,
+                params: dict = None, body: bytes = None,
+                timeout: tuple = None) -> SlimResponse:
+        """Запрос; протухшее keep-alive соединение переоткрывается один раз.
+
+        timeout - (подключение, чтение) в секундах, по умолчанию
+        self.timeout для обоих. Сетевые ошибки приводятся к RequestError,
+        как в get_api_answer.
+        """
+        connect_timeout, read_timeout = timeout or (self.timeout,) * 2
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        query = '&'.join(filter(None, (parts.query, urlencode(params or {}))))
+        if query:
+            path = f'{path}?{query}'
+        for attempt in range(2):
+            connection = self._connection(parts.scheme, parts.netloc)
+            reused = connection.sock is not None
+            connection.timeout = connect_timeout
+            try:
+                connection.request(method, path, body=body,
+                                   headers=headers or {})
+                connection.sock.settimeout(read_timeout)
+                response = connection.getresponse()
+                return SlimResponse(response.status, response.reason,
+                                    response.headers, response.read())
+            except (http.client.HTTPException, OSError) as error:
+                connection.close()
+                if reused and attempt == 0:
+                    continue
+                raise RequestError(
+                    f'Произошла ошибка при запросе к API: {error}', error
+                )
+
+    def get(self, url: str, headers: dict = None, params: dict = None,
+            timeout: tuple = None, **kwargs) -> SlimResponse:
+        """GET-запрос, совместимый с вызовом session.get в homework."""
+        return self.request('GET', url, headers=headers, params=params,
+                            timeout=timeout)
+
+    def post_json(self, url: str, payload: dict,
+                  timeout: tuple = None) -> SlimResponse:
+        """POST-запрос с JSON-телом."""
+        return self.request(
+            'POST', url, headers={'Content-Type': 'application/json'},
+            body=json.dumps(payload, ensure_ascii=False).encode('utf-8'),
+            timeout=timeout
+        )
+
+    def close(self) -> None:
+        """Закрывает все соединения."""
+        for connection in self.connections.values():
+            connection.close()
+        self.connections.clear()
+
+
+class SlimBot:
+    """Отправка сообщений через Bot API без python-telegram-bot.
+
+    Ошибки поднимаются исключениями telegram, чтобы их обрабатывал
+    тот же код, что и для telegram.Bot; сам модуль telegram при этом
+    загружается только на пути ошибки.
+    """
+
+    def __init__(self, token: str, session: SlimSession,
+                 base_url: str = TELEGRAM_API_URL):
+        # base_url в том же формате, что и у telegram.Bot.
+        self.url = f'{base_url}{token}/'
+        self.session = session
+
+    def send_message(self, chat_id, text: str, **kwargs) -> dict:
+        """Вызов sendMessage."""
+        try:
+            response = self.session.post_json(
+                f'{self.url}sendMessage', {'chat_id': chat_id, 'text': text},
+                telegram_timeouts()
+            )
+            data = response.json()
+        except RequestError as request_error:
+            raise homework.telegram.error.NetworkError(str(request_error))
+        except ValueError:
+            raise homework.telegram.error.TelegramError(
+                'Invalid server response'
+            )
+        if data.get('ok'):
+            return data['result']
+        error = homework.telegram.error
+        retry_after = (data.get('parameters') or {}).get('retry_after')
+        if retry_after:
+            raise error.RetryAfter(retry_after)
+        raise error.TelegramError(data.get('description', 'Unknown error'))
+
+
+def main():
+    """Основной цикл бота в облегчённом режиме."""
+    tokens_errors = homework.check_tokens()
+    if tokens_errors:
+        logger.critical('Отсутствует токен: %s. Бот остановлен!',
+                        tokens_errors)
+        sys.exit(-1)
+    session = SlimSession()
+    bot = SlimBot(homework.TELEGRAM_TOKEN, session)
+    journal = Journal(JOURNAL_PATH) if JOURNAL_PATH else None
+    current_timestamp, tracker = homework.restore_state(
+        journal, homework.TELEGRAM_CHAT_ID
+    )
+    alerts = ErrorAggregator()
+    started = True
+    deadline = time.monotonic()
+    try:
+        while not homework.SHUTDOWN.requested:
+            current_timestamp = homework.poll_iteration(
+                bot, tracker, journal, alerts, current_timestamp, session
+            )
+            if started:
+                started = False
+                STARTUP_SECONDS.set(time.monotonic() - PROCESS_STARTED)
+                logger.info('Первый опрос через %.3f с после старта',
+                            STARTUP_SECONDS.value)
+            # Период отсчитывается от прошлого срока, а не от конца
+            # опроса: время запроса не сдвигает график.
+            deadline = max(deadline + homework.RETRY_PERIOD,
+                           time.monotonic())
+            delay = max(deadline - time.monotonic(), 0)
+            with homework.pause(delay):
+                time.sleep(delay)
+    except ShutdownRequested:
+        logger.debug('Пауза между опросами прервана')
+    session.close()
+    if journal is not None:
+        journal.close()
+    logger.info('Бот остановлен')
+
+
+def import_time_report(module: str = 'slim', top: int = 15) -> str:
+    """Разбор вывода python -X importtime для импорта module."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((int(cumulative_us), int(self_us), len(indent), name))
+    total = sum(row[1] for row in rows)
+    lines = [f'Импорт {module}: {total / 1000:.1f} мс, модулей: {len(rows)}',
+             f'{"суммарно, мс":>14} {"свой, мс":>10}  модуль']
+    for cumulative_us, self_us, _, name in sorted(rows, reverse=True)[:top]:
+        lines.append(f'{cumulative_us / 1000:14.1f} {self_us / 1000:10.1f}'
+                     f'  {name}')
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    if '--importtime' in sys.argv:
+        arguments = sys.argv[sys.argv.index('--importtime') + 1:]
+        print(import_time_report(*arguments[:1]))
+        sys.exit(0)
+    setup_logging(logging.INFO)
+    homework.PROFILER.install()
+    homework.SHUTDOWN.install()
+    if RECORD_PATH:
+        homework.RECORDER = Recorder(RECORD_PATH)
+    if metrics.METRICS_PORT:
+        metrics.start_http_server(metrics.METRICS_PORT,
+                                  homework.HEALTH.routes())
+    homework.HEALTH.watch(homework.RETRY_PERIOD).start_watchdog()
+    main()
+    if homework.RECORDER is not None:
+        homework.RECORDER.close()
@@ -0,0 +1,143 @@
+"""Потоковый разбор ответа API с большим списком работ."""
+import codecs
+import json
+import os
+
+import homework
+from exceptions import WrongJSONDecode
+
+STREAM_CHUNK_SIZE = 64 * 1024
+# Ответы больше этого размера (или без Content-Length) разбираются потоково.
+STREAM_MIN_BYTES = int(os.getenv('STREAM_MIN_BYTES', 256 * 1024))
+WHITESPACE = ' \t\n\r'
+
+_decoder = json.JSONDecoder()
+
+
+def is_large(response) -> bool:
+    """Стоит ли разбирать ответ потоково."""
+    length = response.headers.get('Content-Length')
+    return length is None or int(length) > STREAM_MIN_BYTES
+
+
+class HomeworkStream:
+    """Работы из ответа API, прочитанные по одной из потока байтов.
+
+    В памяти одновременно держится одна запись и непрочитанный хвост
+    буфера. Остальные поля ответа (current_date) доступны в fields после
+    полного прохода. Ошибки совпадают с get_api_answer/check_response:
+    WrongJSONDecode для битого JSON, TypeError/KeyError/CurrentDateError
+    для неверной структуры.
+    """
+
+    def __init__(self, chunks, close=None):
+        self._chunks = iter(chunks)
+        self._close = close
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self.fields = {}
+
+    @classmethod
+    def from_response(cls, response) -> 'HomeworkStream':
+        """Поток из ответа requests, запрошенного со stream=True."""
+        return cls(response.iter_content(STREAM_CHUNK_SIZE),
+                   close=response.close)
+
+    @property
+    def current_date(self):
+        """current_date ответа, известен после полного прохода."""
+        return self.fields.get('current_date')
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        # Отбрасываем уже разобранную часть буфера.
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._eof = True
+            self._buffer += self._utf8.decode(b'', final=True)
+            return False
+        self._buffer += self._utf8.decode(chunk)
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            while (self._pos < len(self._buffer)
+                   and self._buffer[self._pos] in WHITESPACE):
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def _expect(self, chars: str) -> str:
+        char = self._peek()
+        if not char or char not in chars:
+            raise WrongJSONDecode(
+                f'Ошибка декодирования JSON: ожидался один из символов '
+                f'{chars!r}, получено {char!r}', None
+            )
+        self._pos += 1
+        return char
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as error:
+                if self._fill():
+                    continue
+                raise WrongJSONDecode(
+                    f'Ошибка декодирования JSON: {error}', error
+                )
+            # Число на границе буфера может продолжиться в следующем куске.
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def _homeworks(self):
+        self._pos += 1
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._expect(',]') == ']':
+                return
+
+    def __iter__(self):
+        try:
+            if self._peek() != '{':
+                homework.check_response(self._value())
+            self._pos += 1
+            char = self._peek()
+            while char != '}':
+                key = self._value()
+                if not isinstance(key, str):
+                    raise WrongJSONDecode(
+                        f'Ошибка декодирования JSON: ключ {key!r} '
+                        f'не является строкой', None
+                    )
+                self._expect(':')
+                if key == 'homeworks' and self._peek() == '[':
+                    yield from self._homeworks()
+                    self.fields[key] = []
+                else:
+                    self.fields[key] = self._value()
+                char = self._expect(',}')
+            homework.check_response(self.fields)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Освобождает соединение, даже если поток прочитан не до конца."""
+        if self._close is not None:
+            self._close()
+            self._close = None
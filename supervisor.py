@@ -0,0 +1,273 @@
+"""Режим нескольких процессов: подписки делятся между воркерами.
+
+Каждый воркер - отдельный процесс с движком опроса (engine.serve) для
+своей доли подписок, поэтому разбор JSON, проверка ответов и TLS
+распределяются по ядрам. Супервизор перезапускает упавшие воркеры,
+по SIGTTIN/SIGTTOU добавляет или убирает воркер с перераспределением
+подписок и отдаёт метрики всех воркеров на METRICS_PORT.
+
+Запуск: WORKERS=4 python supervisor.py
+"""
+import glob
+import hashlib
+import logging
+import multiprocessing
+import os
+import queue
+import re
+import signal
+import threading
+import time
+from http import HTTPStatus
+
+import metrics
+from journal import JOURNAL_PATH, Journal
+from logs import setup_logging
+from recorder import RECORD_PATH, Recorder
+from shutdown import SHUTDOWN_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+WORKERS = int(os.getenv('WORKERS', os.cpu_count() or 1))
+METRICS_PUSH_INTERVAL = 5  # Секунды.
+RESTART_DELAY = 1.0  # Секунды, удваивается при каждом падении подряд.
+MAX_RESTART_DELAY = 60.0
+# Воркер, проработавший столько секунд, считается здоровым.
+STABLE_UPTIME = 60.0
+
+# Метрики только супервизора: воркеры импортируют этот модуль, но не
+# должны присылать копии этих метрик в своей выдаче.
+REGISTRY = metrics.Registry()
+WORKER_RESTARTS = REGISTRY.counter(
+    'homework_worker_restarts', 'Перезапуски упавших воркеров',
+    labelnames=('worker',)
+)
+WORKERS_ALIVE = REGISTRY.gauge('homework_workers_alive', 'Живые воркеры')
+
+
+def shard_of(key: str, shards: int) -> int:
+    """Номер воркера для подписки (rendezvous hashing).
+
+    При изменении числа воркеров переезжает только доля подписок
+    около 1/shards, остальные остаются на прежних воркерах.
+    """
+    return max(range(shards), key=lambda shard: hashlib.blake2b(
+        f'{shard}:{key}'.encode(), digest_size=8
+    ).digest())
+
+
+def shard_journal_path(path: str, shard: int, shards: int) -> str:
+    """Журнал воркера shard из shards."""
+    return f'{path}.{shard}-of-{shards}'
+
+
+def _drain_journals(paths: list) -> tuple:
+    """Курсоры, статусы, названия и истории журналов; журналы удаляются."""
+    cursors, statuses, names, histories = {}, {}, {}, {}
+    for path in paths:
+        journal = Journal(path)
+        cursors.update(journal.cursors)
+        for key, homeworks in journal.statuses.items():
+            statuses.setdefault(key, {}).update(homeworks)
+        for key, homework_names in journal.names.items():
+            names.setdefault(key, {}).update(homework_names)
+        for key, history in journal.history.items():
+            histories.setdefault(key, []).extend(history)
+        journal.close()
+        os.remove(path)
+    return cursors, statuses, names, histories
+
+
+def rebalance_journals(path: str, shards: int) -> None:
+    """Перекладывает журналы воркеров под новое число воркеров."""
+    expected = {shard_journal_path(path, shard, shards)
+                for shard in range(shards)}
+    existing = [name for name in glob.glob(f'{glob.escape(path)}.*-of-*')
+                if re.fullmatch(r'\d+-of-\d+', name[len(path) + 1:])]
+    if set(existing) <= expected:
+        return
+    cursors, statuses, names, histories = _drain_journals(existing)
+    journals = [Journal(shard_journal_path(path, shard, shards))
+                for shard in range(shards)]
+    for key in cursors.keys() | statuses.keys():
+        journal = journals[shard_of(key, shards)]
+        if key in cursors:
+            journal.record_cursor(key, cursors[key])
+        for updated, homework_key, name, status in sorted(
+                histories.get(key, ()), key=lambda entry: entry[0]):
+            journal.record_status(key, homework_key, status, name, updated)
+        homework_names = names.get(key, {})
+        for homework_key, status in statuses.get(key, {}).items():
+            journal.record_status(key, homework_key, status,
+                                  homework_names.get(homework_key))
+    for journal in journals:
+        journal.compact()
+        journal.close()
+    logger.info('Журналы перераспределены между %d воркерами', shards)
+
+
+def push_metrics(shard: int, snapshots, interval: float) -> None:
+    """Периодически отправляет метрики воркера супервизору."""
+    while True:
+        time.sleep(interval)
+        snapshots.put((shard, metrics.REGISTRY.expose()))
+
+
+def run_worker(shard: int, shards: int, snapshots,
+               journal_path: str = JOURNAL_PATH) -> None:
+    """Точка входа процесса-воркера."""
+    import engine
+    import homework
+
+    if RECORD_PATH:
+        homework.RECORDER = Recorder(f'{RECORD_PATH}.{shard}')
+    setup_logging(logging.INFO, path='', fmt=(
+        f'%(asctime)s, воркер {shard}, %(levelname)s, %(name)s, %(message)s'
+    ))
+    subscriptions = [subscription
+                     for subscription in engine.check_config()
+                     if shard_of(subscription.key, shards) == shard]
+    threading.Thread(target=push_metrics, name='metrics-push', daemon=True,
+                     args=(shard, snapshots, METRICS_PUSH_INTERVAL)).start()
+    logger.info('Подписок у воркера: %d', len(subscriptions))
+    engine.serve(
+        subscriptions,
+        journal_path and shard_journal_path(journal_path, shard, shards),
+        webhook_port=0
+    )
+    if homework.RECORDER is not None:
+        homework.RECORDER.close()
+
+
+class Supervisor:
+    """Запускает воркеры и следит за ними."""
+
+    def __init__(self, workers: int = WORKERS,
+                 journal_path: str = JOURNAL_PATH, target=run_worker,
+                 context=None, restart_delay: float = RESTART_DELAY):
+        self.workers = workers
+        self.journal_path = journal_path
+        self.target = target
+        self.context = context or multiprocessing.get_context('spawn')
+        self.restart_delay = restart_delay
+        self.snapshots = self.context.Queue()
+        self.processes = {}
+        self.started_at = {}
+        # Номер воркера -> (падений подряд, когда перезапускать).
+        self.crashes = {}
+        self.collected = {}
+        self.resize_to = None
+        self.stopping = False
+
+    def _spawn(self, shard: int) -> None:
+        process = self.context.Process(
+            target=self.target, name=f'worker-{shard}', daemon=True,
+            args=(shard, self.workers, self.snapshots, self.journal_path)
+        )
+        process.start()
+        self.processes[shard] = process
+        self.started_at[shard] = time.monotonic()
+
+    def start(self) -> None:
+        """Запускает воркеры текущего поколения."""
+        if self.journal_path:
+            rebalance_journals(self.journal_path, self.workers)
+        self.collected = {}
+        for shard in range(self.workers):
+            self._spawn(shard)
+        logger.info('Запущено воркеров: %d', self.workers)
+
+    def stop(self, timeout: float = SHUTDOWN_TIMEOUT + 1) -> None:
+        """Останавливает все воркеры, давая им завершиться по SIGTERM."""
+        for process in self.processes.values():
+            process.terminate()
+        for process in self.processes.values():
+            process.join(timeout)
+            if process.is_alive():
+                process.kill()
+                process.join()
+        self.processes = {}
+        self.crashes = {}
+
+    def resize(self, workers: int) -> None:
+        """Перезапускает воркеры с новым числом долей."""
+        logger.info('Число воркеров: %d -> %d', self.workers, workers)
+        self.stop()
+        self.workers = workers
+        self.start()
+
+    def check(self) -> None:
+        """Перезапускает упавшие воркеры с нарастающей задержкой."""
+        now = time.monotonic()
+        for shard, process in list(self.processes.items()):
+            if process.is_alive():
+                if now - self.started_at[shard] >= STABLE_UPTIME:
+                    self.crashes.pop(shard, None)
+                continue
+            if shard not in self.crashes or self.crashes[shard][1] is None:
+                crashes = self.crashes.get(shard, (0, None))[0] + 1
+                delay = min(self.restart_delay * 2 ** (crashes - 1),
+                            MAX_RESTART_DELAY)
+                logger.error('Воркер %d завершился с кодом %s, перезапуск '
+                             'через %.0f с', shard, process.exitcode, delay)
+                self.crashes[shard] = (crashes, now + delay)
+            if now >= self.crashes[shard][1]:
+                WORKER_RESTARTS.labels(shard).inc()
+                self.crashes[shard] = (self.crashes[shard][0], None)
+                self._spawn(shard)
+        WORKERS_ALIVE.set(sum(process.is_alive()
+                              for process in self.processes.values()))
+
+    def collect(self) -> None:
+        """Забирает присланные воркерами метрики."""
+        while True:
+            try:
+                shard, text = self.snapshots.get_nowait()
+            except queue.Empty:
+                return
+            if shard < self.workers:
+                self.collected[str(shard)] = text
+
+    def metrics_route(self) -> tuple:
+        """Обработчик /metrics: метрики воркеров и супервизора."""
+        return (HTTPStatus.OK, metrics.CONTENT_TYPE,
+                metrics.merge_expositions({
+                    **self.collected,
+                    None: metrics.REGISTRY.expose() + REGISTRY.expose(),
+                }))
+
+    def _on_signal(self, signum, frame) -> None:
+        if signum == signal.SIGTTIN:
+            self.resize_to = (self.resize_to or self.workers) + 1
+        elif signum == signal.SIGTTOU:
+            self.resize_to = max((self.resize_to or self.workers) - 1, 1)
+        else:
+            self.stopping = True
+
+    def run(self, interval: float = 1.0) -> None:
+        """Основной цикл супервизора до SIGTERM или SIGINT."""
+        for signum in (signal.SIGTTIN, signal.SIGTTOU, signal.SIGTERM,
+                       signal.SIGINT):
+            signal.signal(signum, self._on_signal)
+        self.start()
+        try:
+            while not self.stopping:
+                self.collect()
+                if self.resize_to and self.resize_to != self.workers:
+                    self.resize(self.resize_to)
+                self.resize_to = None
+                self.check()
+                time.sleep(interval)
+        finally:
+            self.stop()
+
+
+if __name__ == '__main__':
+    setup_logging(logging.INFO)
+    supervisor = Supervisor()
+    if metrics.METRICS_PORT:
+        metrics.start_http_server(
+            metrics.METRICS_PORT,
+            routes={'/metrics': supervisor.metrics_route}
+        )
+    supervisor.run()
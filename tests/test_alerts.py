@@ -0,0 +1,35 @@
+import utils
+from alerts import ErrorAggregator, error_key
+from exceptions import CurrentDateError, RequestError
+
+
+def test_first_error_summary_and_recovery():
+    clock = utils.FakeClock()
+    alerts = ErrorAggregator(interval=3600, clock=clock)
+    assert alerts.report(RequestError('timeout 1')) == (
+        'Сбой в работе программы: timeout 1'
+    )
+    for number in range(2, 39):
+        clock.now = number
+        assert alerts.report(RequestError(f'timeout {number}')) is None
+    assert alerts.summaries() == []
+
+    clock.now = 3600
+    assert alerts.summaries() == ['RequestError ×37 за последние 60 мин']
+    assert alerts.summaries() == []
+    assert alerts.resolve() == [
+        'Работа восстановлена. Ошибок за время сбоя: RequestError ×38'
+    ]
+    assert alerts.resolve() == []
+
+
+def test_not_for_send_is_never_reported():
+    alerts = ErrorAggregator()
+    assert alerts.report(CurrentDateError('нет current_date')) is None
+    assert alerts.resolve() == []
+
+
+def test_key_ignores_numbers_but_not_class():
+    assert error_key(RequestError('код 500')) == error_key(
+        RequestError('код 502'))
+    assert error_key(RequestError('x')) != error_key(KeyError('x'))
@@ -0,0 +1,16 @@
+import json
+
+from benchmarks import run
+
+
+def test_benchmark_reports_metrics(tmp_path):
+    output = tmp_path / 'result.json'
+    result = run.main(['--subscriptions', '5', '--rounds', '2',
+                       '--homeworks', '3', '--output', str(output)])
+    metrics = json.loads(output.read_text())['metrics']
+    assert metrics == result['metrics']
+    assert metrics['polls'] == 10
+    assert metrics['errors'] == 0
+    assert metrics['messages_sent'] == 30
+    assert metrics['latency_p99_ms'] >= metrics['latency_p50_ms'] > 0
+    assert run.compare(result, result)
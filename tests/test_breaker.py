@@ -0,0 +1,77 @@
+from http import HTTPStatus
+
+import pytest
+import requests
+
+import homework
+import utils
+from breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from exceptions import CircuitOpen, EndPointIsNotAvailiable, RequestError
+
+
+def test_breaker_opens_probes_and_closes():
+    clock = utils.FakeClock()
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=4, window=10,
+                             open_period=30, probes=2, clock=clock)
+    breaker.record_success()
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+
+    clock.now = 30
+    breaker.before_call()
+    breaker.before_call()
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now = 60
+    breaker.before_call()
+    breaker.record_success()
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+class Session:
+    def __init__(self, status=None):
+        self.status = status
+        self.calls = 0
+
+    def get(self, **kwargs):
+        self.calls += 1
+        if self.status is None:
+            raise requests.ConnectionError('down')
+        response = requests.Response()
+        response.status_code = self.status
+        response._content = b'{}'
+        return response
+
+
+def test_request_api_stops_calling_open_endpoint():
+    breaker = CircuitBreaker(min_calls=2, open_period=60, clock=utils.FakeClock())
+    down = Session()
+    with pytest.raises(RequestError):
+        homework.request_api({}, 0, down, breaker=breaker)
+    broken = Session(HTTPStatus.BAD_GATEWAY)
+    with pytest.raises(EndPointIsNotAvailiable):
+        homework.request_api({}, 0, broken, breaker=breaker)
+    for _ in range(5):
+        with pytest.raises(CircuitOpen):
+            homework.request_api({}, 0, down, breaker=breaker)
+    assert down.calls == 1
+
+
+def test_client_errors_do_not_open_breaker():
+    breaker = CircuitBreaker(min_calls=2, clock=utils.FakeClock())
+    session = Session(HTTPStatus.UNAUTHORIZED)
+    for _ in range(5):
+        with pytest.raises(EndPointIsNotAvailiable):
+            homework.request_api({}, 0, session, breaker=breaker)
+    assert breaker.state == CLOSED
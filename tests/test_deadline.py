@@ -0,0 +1,63 @@
+import pytest
+import telegram
+
+import deadline
+import homework
+import utils
+from exceptions import DeadlineExceeded
+from tracker import HomeworkTracker
+
+
+def test_timeouts_are_clipped_to_remaining_budget():
+    clock = utils.FakeClock()
+    assert deadline.api_timeouts() == (deadline.API_CONNECT_TIMEOUT,
+                                       deadline.API_READ_TIMEOUT)
+    with deadline.Deadline(budget=5, clock=clock):
+        clock.now = 4
+        assert deadline.timeouts(3, 10, 'fetch') == (1, 1)
+        clock.now = 5
+        exceeded = deadline.DEADLINE_EXCEEDED.labels('fetch').value
+        with pytest.raises(DeadlineExceeded):
+            deadline.timeouts(3, 10, 'fetch')
+        assert deadline.DEADLINE_EXCEEDED.labels('fetch').value == exceeded + 1
+    assert deadline.timeouts(3, 10, 'fetch') == (3, 10)
+
+
+def test_request_passes_timeouts(random_timestamp):
+    seen = {}
+
+    class Session:
+        def get(self, **kwargs):
+            seen.update(kwargs)
+            return utils.MockResponseGET(random_timestamp=random_timestamp)
+
+    homework.request_api({}, random_timestamp, Session())
+    assert seen['timeout'] == deadline.api_timeouts()
+
+
+def test_sends_after_deadline_are_deferred():
+    clock = utils.FakeClock()
+
+    class SlowBot:
+        sent = []
+
+        def send_message(self, chat_id=None, text=None, timeout=None):
+            assert timeout <= 1
+            clock.now += 0.6
+            self.sent.append(text)
+
+    bot = SlowBot()
+    tracker = HomeworkTracker()
+    homeworks = [{'homework_name': f'hw{i}', 'status': 'approved'}
+                 for i in range(3)]
+    with pytest.raises(DeadlineExceeded):
+        with deadline.Deadline(budget=1, clock=clock):
+            homework.process_homeworks(bot, tracker, homeworks)
+    assert len(bot.sent) == 2
+    # Неотправленная работа осталась изменившейся и уйдёт в следующий раз.
+    assert len(tracker.diff(homework.build_records(homeworks))) == 1
+
+
+def test_main_bot_uses_configured_timeouts():
+    bot = homework.configure_bot(telegram.Bot(token='1234:abcdefg'))
+    assert bot.request._connect_timeout == deadline.TELEGRAM_CONNECT_TIMEOUT
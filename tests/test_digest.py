@@ -0,0 +1,69 @@
+import homework
+import utils
+from digest import MESSAGE_LIMIT, DigestBuffer, pack
+from sender import MessageSender
+from tracker import HomeworkTracker
+
+
+class RecordingBot:
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+def test_pack_splits_at_telegram_limit():
+    parts = [f'{number:03d}' + 'x' * 96 for number in range(100)]
+    messages = pack(parts)
+    assert all(len(text) <= MESSAGE_LIMIT for text, _ in messages)
+    assert sum(count for _, count in messages) == 100
+    assert len(messages) == 3
+    assert pack(['one']) == [('one', 1)]
+
+
+def test_pack_cuts_oversized_part():
+    messages = pack(['a', 'b' * 5000], limit=4096)
+    assert [count for _, count in messages] == [1, 0, 1]
+    assert ''.join(text for text, _ in messages[1:]) == 'b' * 5000
+
+
+def test_buffer_flushes_after_window():
+    clock = utils.FakeClock()
+    buffer = DigestBuffer(window=10, clock=clock)
+    buffer.add('a', 'first')
+    clock.now = 5
+    buffer.add('a', 'second')
+    assert buffer.due() == [] and len(buffer) == 2
+    assert buffer.next_due() == 5
+    clock.now = 10
+    [(chat_id, text)] = buffer.due()
+    assert chat_id == 'a' and text.endswith('first\nsecond')
+    assert len(buffer) == 0
+
+
+def test_sender_batches_and_lets_urgent_through():
+    bot = RecordingBot()
+    sender = MessageSender(bot, chat_rate=100, global_rate=100,
+                           digest_window=0.1).start()
+    for number in range(20):
+        sender.submit('a', f'status {number}', urgent=False)
+    sender.submit('a', 'rejected now', urgent=True)
+    sender.close(timeout=1)
+    assert bot.sent[0] == ('a', 'rejected now')
+    assert len(bot.sent) == 2
+    assert bot.sent[1][1].count('status') == 20
+
+
+def test_main_loop_sends_one_digest_per_poll(monkeypatch):
+    monkeypatch.setattr(homework, 'DIGEST_WINDOW', 60)
+    bot = RecordingBot()
+    tracker = HomeworkTracker()
+    homeworks = [{'id': number, 'homework_name': f'hw{number}',
+                  'status': 'rejected' if number == 3 else 'approved'}
+                 for number in range(10)]
+    homework.process_homeworks(bot, tracker, homeworks)
+    assert len(bot.sent) == 2
+    assert '"hw3"' in bot.sent[0][1]
+    assert bot.sent[1][1].count('Изменился статус') == 9
+    assert len(tracker.statuses) == 10
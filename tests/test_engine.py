@@ -0,0 +1,144 @@
+import asyncio
+import gc
+import json
+import time
+
+import requests
+
+import utils
+
+
+def test_load_subscriptions_deduplicates(tmp_path):
+    import engine
+
+    path = tmp_path / 'subscriptions.json'
+    path.write_text(json.dumps([
+        {'practicum_token': 'a', 'chat_id': 1},
+        {'practicum_token': 'b', 'chat_id': 2},
+        {'practicum_token': 'a', 'chat_id': 1},
+    ]))
+    subscriptions = engine.load_subscriptions(str(path))
+    assert subscriptions == [
+        engine.Subscription('a', '1'), engine.Subscription('b', '2')
+    ]
+
+
+def test_engine_polls_every_subscription(monkeypatch, random_timestamp):
+    import engine
+
+    seen_headers = []
+
+    def mock_get(*args, **kwargs):
+        seen_headers.append(kwargs['headers']['Authorization'])
+        return utils.MockResponseGET(
+            random_timestamp=random_timestamp,
+            data={
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': random_timestamp,
+            }
+        )
+
+    monkeypatch.setattr(requests, 'get', mock_get)
+    bot = utils.MockTelegramBot()
+    subscriptions = [engine.Subscription(str(i), str(i)) for i in range(20)]
+    polling = engine.PollingEngine(bot, subscriptions, concurrency=4)
+
+    async def poll_once():
+        polling._semaphore = asyncio.Semaphore(polling.concurrency)
+        await asyncio.gather(*(polling.poll(sub) for sub in subscriptions))
+
+    asyncio.run(poll_once())
+    assert sorted(seen_headers) == sorted(
+        f'OAuth {i}' for i in range(20)
+    )
+    assert all(
+        cursor == random_timestamp for cursor in polling.cursors.values()
+    )
+    assert bot.text.endswith('Ура!')
+
+
+def test_engine_stop_waits_for_started_polls():
+    import engine
+
+    polling = engine.PollingEngine(utils.MockTelegramBot(), [])
+    finished = []
+
+    async def slow_poll():
+        await asyncio.sleep(0.1)
+        finished.append(True)
+
+    async def run_and_stop():
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.05, lambda: polling.tasks.add(
+            asyncio.create_task(slow_poll())
+        ))
+        loop.call_later(0.06, polling.stop)
+        await polling.run()
+
+    asyncio.run(run_and_stop())
+    assert finished == [True]
+
+
+def test_engine_stop_retrieves_cancelled_workers():
+    import engine
+
+    polling = engine.PollingEngine(utils.MockTelegramBot(), [])
+    errors = []
+
+    async def run_and_stop():
+        loop = asyncio.get_running_loop()
+        loop.set_exception_handler(lambda loop, context: errors.append(
+            context['message']
+        ))
+        loop.call_later(0.05, polling.stop)
+        await polling.run()
+        gc.collect()
+
+    asyncio.run(run_and_stop())
+    assert errors == []
+
+
+def test_engine_shutdown_fits_one_deadline():
+    import engine
+
+    polling = engine.PollingEngine(utils.MockTelegramBot(), [],
+                                   shutdown_timeout=0.2)
+
+    async def run_and_stop():
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.05, lambda: polling.tasks.add(
+            asyncio.create_task(asyncio.to_thread(time.sleep, 0.6))
+        ))
+        loop.call_later(0.06, polling.stop)
+        await polling.run()
+
+    started = time.monotonic()
+    asyncio.run(run_and_stop())
+    assert time.monotonic() - started < 0.45
+    assert polling.remaining() == 0
+    assert polling.stragglers == 1
+
+
+def test_engine_restores_status_for_schedule(tmp_path):
+    import engine
+    from journal import Journal
+    from records import Homework
+    from scheduler import MIN_POLL_PERIOD, AdaptiveSchedule
+
+    subscription = engine.Subscription('token', '1')
+    path = str(tmp_path / 'journal.jsonl')
+    journal = Journal(path)
+    polling = engine.PollingEngine(utils.MockTelegramBot(), [subscription],
+                                   journal=journal)
+    polling.trackers[subscription].commit(
+        Homework(555, 'hw.zip', 'reviewing', 100)
+    )
+    journal.close()
+
+    journal = Journal(path)
+    polling = engine.PollingEngine(utils.MockTelegramBot(), [subscription],
+                                   journal=journal,
+                                   schedule=AdaptiveSchedule())
+    journal.close()
+    assert polling.statuses[subscription] == 'reviewing'
+    assert polling.next_delay(subscription, True) == MIN_POLL_PERIOD
@@ -0,0 +1,60 @@
+import json
+
+import requests
+
+import fingerprint
+
+
+def make_response(payload, status=200, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(payload).encode()
+    response._content_consumed = True
+    response.headers['Content-Length'] = str(len(response._content))
+    response.headers.update(headers or {})
+    return response
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.request_headers = []
+
+    def get(self, url=None, headers=None, params=None, **kwargs):
+        self.request_headers.append(headers)
+        return self.responses.pop(0)
+
+
+def test_unchanged_body_skips_decoding():
+    cache = fingerprint.ResponseCache()
+    session = FakeSession([
+        make_response({'homeworks': [], 'current_date': 100}),
+        make_response({'homeworks': [], 'current_date': 200}),
+        make_response({'homeworks': [{'status': 'approved'}],
+                       'current_date': 300}),
+    ])
+    hits = fingerprint.FAST_PATH_POLLS.value
+
+    first = fingerprint.fetch_if_changed(cache, 'chat', {}, 0, session)
+    second = fingerprint.fetch_if_changed(cache, 'chat', {}, 100, session)
+    third = fingerprint.fetch_if_changed(cache, 'chat', {}, 200, session)
+
+    assert first.response == {'homeworks': [], 'current_date': 100}
+    assert second == fingerprint.PollResult(None, 200)
+    assert third.response['current_date'] == 300
+    assert fingerprint.FAST_PATH_POLLS.value == hits + 1
+
+
+def test_etag_is_sent_back_and_304_is_fast_path():
+    cache = fingerprint.ResponseCache()
+    session = FakeSession([
+        make_response({'homeworks': [], 'current_date': 100},
+                      headers={'ETag': '"v1"'}),
+        make_response({}, status=304),
+    ])
+    fingerprint.fetch_if_changed(cache, 'chat', {'Authorization': 'x'}, 0,
+                                 session)
+    result = fingerprint.fetch_if_changed(cache, 'chat', {}, 100, session)
+
+    assert session.request_headers[1]['If-None-Match'] == '"v1"'
+    assert result == fingerprint.PollResult(None, None)
@@ -0,0 +1,77 @@
+import json
+import urllib.error
+import urllib.request
+from http import HTTPStatus
+
+import metrics
+import utils
+from breaker import CircuitBreaker
+from health import Health
+
+
+def test_liveness_fails_when_loop_stalls():
+    clock = utils.FakeClock()
+    health = Health(factor=3, clock=clock).watch(10)
+    health.beat()
+    clock.now = 25
+    status, _, body = health.liveness_route()
+    assert status == HTTPStatus.OK
+    assert json.loads(body)['since_last_iteration'] == 25
+    clock.now = 31
+    assert health.liveness_route()[0] == HTTPStatus.SERVICE_UNAVAILABLE
+    health.check(restart=False)
+    assert health.stalled
+    health.beat()
+    health.check(restart=False)
+    assert not health.stalled
+
+
+def test_liveness_fails_when_work_hangs_despite_beats():
+    clock = utils.FakeClock()
+    in_flight = {}
+    health = Health(factor=3, clock=clock).watch(
+        1, oldest=lambda: min(in_flight.values(), default=None),
+        work_limit=10
+    )
+    in_flight['poll'] = clock.now
+    for second in range(1, 31):
+        clock.now = second
+        health.beat()
+    assert health.liveness_route()[0] == HTTPStatus.OK
+    clock.now = 31
+    health.beat()
+    status, _, body = health.liveness_route()
+    assert status == HTTPStatus.SERVICE_UNAVAILABLE
+    assert json.loads(body)['oldest_work'] == 31
+    del in_flight['poll']
+    assert health.liveness_route()[0] == HTTPStatus.OK
+
+
+def test_readiness_needs_poll_and_closed_breaker():
+    clock = utils.FakeClock()
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=1, clock=clock)
+    health = Health(clock=clock).watch(10, breaker, send=lambda: 3)
+    assert health.readiness_route()[0] == HTTPStatus.SERVICE_UNAVAILABLE
+    health.poll_succeeded()
+    status, _, body = health.readiness_route()
+    assert status == HTTPStatus.OK
+    assert json.loads(body)['queues'] == {'send': 3}
+    breaker.record_failure()
+    assert health.readiness_route()[0] == HTTPStatus.SERVICE_UNAVAILABLE
+
+
+def test_health_routes_served_with_metrics():
+    health = Health().watch(10)
+    server = metrics.start_http_server(0, health.routes(), host='127.0.0.1')
+    url = f'http://127.0.0.1:{server.server_address[1]}'
+    try:
+        with urllib.request.urlopen(f'{url}/healthz', timeout=1) as response:
+            assert json.loads(response.read())['stalled'] is False
+        try:
+            urllib.request.urlopen(f'{url}/readyz', timeout=1)
+        except urllib.error.HTTPError as error:
+            assert error.code == HTTPStatus.SERVICE_UNAVAILABLE
+        else:
+            raise AssertionError('/readyz до первого опроса должен быть 503')
+    finally:
+        server.shutdown()
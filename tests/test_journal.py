@@ -0,0 +1,67 @@
+import telegram
+
+from homework import process_homeworks, restore_state
+from journal import Journal
+from records import Homework
+
+
+def test_journal_survives_restart(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = Journal(path)
+    journal.record_cursor('chat', 100)
+    journal.record_status('chat', 1, 'reviewing')
+    journal.record_status('chat', 1, 'approved')
+    journal.record_cursor('chat', 200)
+    journal.close()
+
+    restored = Journal(path)
+    assert restored.restore('chat') == (200, {1: 'approved'})
+    assert restored.restore('other') == (None, {})
+    restored.close()
+
+
+def test_journal_skips_torn_tail_and_compacts(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    path.write_text('{"s": "chat", "c": 5}\n{"s": "chat", "c"')
+    journal = Journal(str(path))
+    assert journal.restore('chat') == (5, {})
+    for cursor in range(6, 3000):
+        journal.record_cursor('chat', cursor)
+    journal.close()
+
+    assert len(path.read_text().splitlines()) < 1100
+    assert Journal(str(path)).restore('chat') == (2999, {})
+
+
+def test_journal_restores_names_and_history(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = Journal(path, history_size=2)
+    _, tracker = restore_state(journal, 'chat')
+    tracker.commit(Homework(555, 'hw.zip', 'reviewing', 100))
+    tracker.commit(Homework(777, 'hw2.zip', 'reviewing', 150))
+    tracker.commit(Homework(555, 'hw.zip', 'approved', 200))
+    journal.compact()
+    journal.close()
+
+    journal = Journal(path, history_size=2)
+    _, tracker = restore_state(journal, 'chat')
+    assert tracker.statuses == {555: 'approved', 777: 'reviewing'}
+    assert tracker.names == {555: 'hw.zip', 777: 'hw2.zip'}
+    assert list(tracker.history) == [(150, 'hw2.zip', 'reviewing'),
+                                     (200, 'hw.zip', 'approved')]
+    journal.close()
+    assert len(open(path, encoding='UTF-8').readlines()) == 4
+
+
+def test_failed_send_is_not_journaled(tmp_path):
+    class DownBot:
+        def send_message(self, **kwargs):
+            raise telegram.error.NetworkError('down')
+
+    journal = Journal(str(tmp_path / 'journal.jsonl'))
+    _, tracker = restore_state(journal, 'chat')
+    homeworks = [{'id': 1, 'homework_name': 'hw.zip', 'status': 'approved'}]
+    process_homeworks(DownBot(), tracker, homeworks)
+    assert tracker.statuses == {}
+    assert journal.restore('chat') == (None, {})
+    journal.close()
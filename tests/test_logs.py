@@ -0,0 +1,58 @@
+import logging
+import queue
+
+import utils
+from logs import CollapsingQueueHandler, file_handler
+
+
+def make_logger(handler):
+    logger = logging.getLogger('test_logs')
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def drain(log_queue):
+    messages = []
+    while not log_queue.empty():
+        messages.append(log_queue.get_nowait().getMessage())
+    return messages
+
+
+def test_repeats_are_collapsed():
+    log_queue = queue.SimpleQueue()
+    clock = utils.FakeClock()
+    handler = CollapsingQueueHandler(log_queue, interval=10,
+                                     clock=clock)
+    logger = make_logger(handler)
+    for _ in range(5):
+        logger.info('Нет новых статусов')
+    logger.info('Статус %s', 'approved')
+    assert drain(log_queue) == [
+        'Нет новых статусов',
+        'Сообщение повторилось ещё 4 раз: Нет новых статусов',
+        'Статус approved',
+    ]
+
+    logger.info('Статус %s', 'approved')
+    clock.now = 11
+    logger.info('Статус %s', 'approved')
+    logger.info('Статус %s', 'approved')
+    handler.flush()
+    assert drain(log_queue) == [
+        'Сообщение повторилось ещё 2 раз: Статус approved',
+        'Сообщение повторилось ещё 1 раз: Статус approved',
+    ]
+
+
+def test_file_handler_rotates_by_size(tmp_path):
+    path = tmp_path / 'bot.log'
+    handler = file_handler(str(path), max_bytes=100, backup_count=2, when='')
+    logger = make_logger(handler)
+    for number in range(20):
+        logger.info('Запись номер %d', number)
+    handler.close()
+    assert sorted(file.name for file in tmp_path.iterdir()) == [
+        'bot.log', 'bot.log.1', 'bot.log.2'
+    ]
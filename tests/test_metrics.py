@@ -0,0 +1,38 @@
+from urllib.request import urlopen
+
+import homework  # noqa: F401 - регистрирует метрики бота.
+import metrics
+
+
+def test_exposition_format():
+    registry = metrics.Registry()
+    errors = registry.counter('errors', 'Errors', ('exception',))
+    errors.labels('RequestError').inc()
+    errors.labels('RequestError').inc(2)
+    lag = registry.gauge('lag_seconds', 'Lag')
+    lag.set_function(lambda: 5)
+    latency = registry.histogram('latency_seconds', 'Latency',
+                                 buckets=(0.1, 1))
+    latency.observe(0.05)
+    latency.observe(0.5)
+
+    text = registry.expose()
+    assert '# TYPE errors counter' in text
+    assert 'errors_total{exception="RequestError"} 3.0' in text
+    assert 'lag_seconds 5.0' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 2' in text
+    assert 'latency_seconds_count 2' in text
+
+
+def test_http_endpoint_serves_registry():
+    metrics.counter('test_http_requests', 'Test counter').inc()
+    server = metrics.start_http_server(0, host='127.0.0.1')
+    try:
+        port = server.server_address[1]
+        body = urlopen(f'http://127.0.0.1:{port}/metrics').read().decode()
+    finally:
+        server.shutdown()
+    assert 'test_http_requests_total 1.0' in body
+    assert '# TYPE homework_errors counter' in body
+    assert 'homework_errors_total{exception="CurrentDateError"} 0.0' in body
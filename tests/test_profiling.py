@@ -0,0 +1,34 @@
+import homework
+from profiling import Profiler
+
+
+def test_trigger_file_profiles_next_iterations(tmp_path):
+    trigger = tmp_path / 'profile-now'
+    profiler = Profiler(iterations=2, directory=str(tmp_path),
+                        trigger=str(trigger))
+    with profiler.iteration():
+        pass
+    assert profiler.profile is None
+
+    trigger.touch()
+    for _ in range(2):
+        with profiler.iteration():
+            homework.check_response({'homeworks': [], 'current_date': 1})
+    assert not trigger.exists()
+    assert profiler.profile is None
+    reports = sorted(path.name for path in tmp_path.iterdir())
+    assert len(reports) == 2
+    assert reports[0].endswith('.prof') and reports[1].endswith('.prof.txt')
+    assert 'check_response' in (tmp_path / reports[1]).read_text()
+
+
+def test_signal_request_starts_sampler(tmp_path):
+    profiler = Profiler(directory=str(tmp_path), trigger='')
+    profiler._on_signal(None, None)
+    assert profiler.check()
+    assert not profiler.check()
+    profiler.sample(0.05)
+    profiler.sample(0.05)
+    profiler.sampler.join(1)
+    [folded] = tmp_path.iterdir()
+    assert folded.name.endswith('.folded')
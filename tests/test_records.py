@@ -0,0 +1,35 @@
+import sys
+
+import pytest
+
+from homework import HOMEWORK_VERDICTS
+from records import Homework
+
+
+def test_record_is_built_from_api_dict():
+    record = Homework.from_dict({
+        'id': 7, 'status': 'approved', 'homework_name': 'hw.zip',
+        'reviewer_comment': 'ok', 'date_updated': '2020-02-13T14:40:57Z',
+        'lesson_name': 'lesson'
+    }, HOMEWORK_VERDICTS)
+    assert record == Homework(7, 'hw.zip', 'approved', 1581604857)
+    assert record.status is sys.intern('approved')
+    assert not hasattr(record, '__dict__')
+
+
+def test_key_falls_back_to_name():
+    record = Homework.from_dict({'homework_name': 'hw', 'status': 'rejected'},
+                                HOMEWORK_VERDICTS)
+    assert record.key == 'hw'
+    assert record.updated == 0
+
+
+@pytest.mark.parametrize('data, error', [
+    ({'status': 'approved'}, KeyError),
+    ({'homework_name': 'hw', 'status': 'unknown'}, ValueError),
+    ({'homework_name': 'hw'}, ValueError),
+    (['hw'], TypeError),
+])
+def test_invalid_records(data, error):
+    with pytest.raises(error):
+        Homework.from_dict(data, HOMEWORK_VERDICTS)
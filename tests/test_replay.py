@@ -0,0 +1,58 @@
+import homework
+import replay
+from benchmarks.stubs import PracticumStub
+from recorder import Recorder, load_recording
+from tracker import HomeworkTracker
+
+
+def test_recorded_session_replays_to_same_messages(tmp_path, monkeypatch):
+    path = str(tmp_path / 'session.jsonl.gz')
+    monkeypatch.setattr(homework, 'RECORDER', Recorder(path))
+    bot = replay.ReplayBot()
+    tracker = HomeworkTracker()
+    with PracticumStub(homeworks=3) as practicum:
+        monkeypatch.setattr(homework, 'ENDPOINT', practicum.endpoint)
+        for _ in range(2):
+            response = homework.fetch_api_answer(
+                {'Authorization': 'OAuth secret'}, 0
+            )
+            homework.process_homeworks(
+                bot, tracker, homework.check_response(response)
+            )
+    homework.RECORDER.close()
+    monkeypatch.setattr(homework, 'RECORDER', None)
+
+    records = list(load_recording(path))
+    assert [record['k'] for record in records] == (
+        ['start', 'api', 'tg', 'tg', 'tg', 'api']
+    )
+    assert 'secret' not in str(records)
+
+    report = replay.replay(path, speed=0)
+    assert report['api_responses'] == 2
+    assert report['messages_sent'] == report['messages_recorded'] == 3
+    assert report['missing'] == report['unexpected'] == []
+    assert report['errors'] == {}
+
+
+def test_large_streamed_body_is_not_recorded(tmp_path):
+    class StreamedResponse:
+        status_code = 200
+        headers = {'Content-Type': 'application/json'}
+
+        @property
+        def text(self):
+            raise AssertionError('тело потокового ответа прочитано')
+
+    path = str(tmp_path / 'session.jsonl')
+    recorder = Recorder(path)
+    recorder.record_api({}, {'from_date': 0}, StreamedResponse(),
+                        stream=True)
+    recorder.close()
+
+    record = list(load_recording(path))[-1]
+    assert record['s'] is True and 'b' not in record
+    report = replay.replay(path, speed=0)
+    assert report['streamed_skipped'] == 1
+    assert report['api_responses'] == 0
+    assert report['errors'] == {}
@@ -0,0 +1,47 @@
+import scheduler
+import utils
+
+
+def test_reviewing_is_polled_faster_than_approved():
+    schedule = scheduler.AdaptiveSchedule(min_period=60, max_period=3600)
+    reviewing = schedule.next_delay('a', 'reviewing', changed=True)
+    approved = schedule.next_delay('b', 'approved', changed=True)
+    assert reviewing == 60
+    assert approved > reviewing
+
+
+def test_idle_polls_back_off_within_bounds():
+    schedule = scheduler.AdaptiveSchedule(min_period=60, max_period=3600,
+                                          backoff=2)
+    delays = [schedule.next_delay('a') for _ in range(200)]
+    assert delays == sorted(delays)
+    assert delays[-1] == 3600
+    assert schedule.next_delay('a', changed=True) == delays[0]
+
+
+def test_jitter_spreads_subscriptions_evenly():
+    offsets = [scheduler.jitter_offset(f'chat-{number}', 600)
+               for number in range(6000)]
+    per_minute = [0] * 10
+    for offset in offsets:
+        per_minute[int(offset // 60)] += 1
+    assert min(per_minute) > 500 and max(per_minute) < 700
+    assert scheduler.jitter_offset('chat-1', 600) == offsets[1]
+
+
+def test_timer_wheel_fires_on_deadline_and_reschedules():
+    clock = utils.FakeClock()
+    wheel = scheduler.TimerWheel(tick=1, slots=8, clock=clock)
+    wheel.schedule('a', 2.5)
+    wheel.schedule('b', 20.2)
+    wheel.schedule('c', 5)
+    wheel.schedule('c', 4)
+    wheel.cancel('missing')
+    clock.now = 3
+    assert wheel.advance() == [('a', 2.5)]
+    clock.now = 19
+    assert wheel.advance() == [('c', 4)]
+    assert len(wheel) == 1
+    clock.now = 21
+    assert wheel.advance() == [('b', 20.2)]
+    assert wheel.next_tick() == 1
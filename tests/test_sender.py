@@ -0,0 +1,60 @@
+import time
+
+import telegram
+
+import utils
+from sender import MessageSender, TokenBucket
+
+
+class RecordingBot:
+    def __init__(self, retry_after_first=False, flood_text=None,
+                 retry_after=0.05):
+        self.sent = []
+        self.retry_after_first = retry_after_first
+        self.flood_text = flood_text
+        self.retry_after = retry_after
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.retry_after_first or text == self.flood_text:
+            self.retry_after_first = False
+            self.flood_text = None
+            raise telegram.error.RetryAfter(self.retry_after)
+        self.sent.append((chat_id, text, time.monotonic()))
+
+
+def test_token_bucket_spaces_reservations():
+    clock = utils.FakeClock()
+    bucket = TokenBucket(rate=2, clock=clock)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0.5
+    assert bucket.reserve() == 1.0
+
+
+def test_sender_limits_each_chat_and_keeps_order():
+    bot = RecordingBot(retry_after_first=True)
+    sender = MessageSender(bot, chat_rate=20, global_rate=100).start()
+    for number in range(3):
+        assert sender.submit('a', f'a{number}')
+        assert sender.submit('b', f'b{number}')
+    sender.close(timeout=2)
+
+    stats = sender.stats()
+    assert stats['sent'] == 6
+    assert stats['retried'] == 1
+    assert stats['pending'] == 0
+    a_sent = [entry for entry in bot.sent if entry[0] == 'a']
+    assert [text for _, text, _ in a_sent] == ['a0', 'a1', 'a2']
+    assert a_sent[-1][2] - a_sent[0][2] >= 0.09
+
+
+def test_retry_after_pushes_back_queued_messages_of_chat():
+    bot = RecordingBot(flood_text='a1', retry_after=0.5)
+    sender = MessageSender(bot, chat_rate=10, global_rate=100)
+    for number in range(4):
+        assert sender.submit('a', f'a{number}')
+    sender.start().close(timeout=2)
+
+    assert [text for _, text, _ in bot.sent] == ['a0', 'a1', 'a2', 'a3']
+    times = [sent_at for _, _, sent_at in bot.sent]
+    assert times[1] - times[0] >= 0.5
+    assert times[2] - times[1] >= 0.09
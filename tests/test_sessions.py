@@ -0,0 +1,35 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'{"homeworks": [], "current_date": 1}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_session_pool_reuses_connections():
+    import sessions
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/'
+    pool = sessions.SessionPool(pool_size=2)
+    try:
+        for _ in range(5):
+            assert pool.get(url=url, timeout=2).json()['current_date'] == 1
+        stats = pool.stats()
+    finally:
+        pool.close()
+        server.shutdown()
+    assert stats['api_connections_new'] == 1
+    assert stats['api_connections_reused'] == 4
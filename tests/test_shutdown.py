@@ -0,0 +1,40 @@
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from shutdown import GracefulShutdown, ShutdownRequested
+
+
+@pytest.fixture
+def shutdown():
+    previous = signal.getsignal(signal.SIGUSR1), signal.getsignal(
+        signal.SIGALRM
+    )
+    yield GracefulShutdown(timeout=0, signals=(signal.SIGUSR1,)).install()
+    signal.signal(signal.SIGUSR1, previous[0])
+    signal.signal(signal.SIGALRM, previous[1])
+
+
+def test_signal_interrupts_sleep(shutdown):
+    threading.Timer(0.05, os.kill, (os.getpid(), signal.SIGUSR1)).start()
+    started = time.monotonic()
+    with pytest.raises(ShutdownRequested):
+        with shutdown.interruptible():
+            time.sleep(5)
+    assert time.monotonic() - started < 1
+    assert shutdown.requested and not shutdown.sleeping
+
+
+def test_signal_outside_sleep_only_sets_flag(shutdown):
+    os.kill(os.getpid(), signal.SIGUSR1)
+    assert shutdown.requested
+    ran = []
+    with pytest.raises(ShutdownRequested):
+        with shutdown.interruptible():
+            ran.append(True)
+    assert ran == []
+    with pytest.raises(SystemExit):
+        os.kill(os.getpid(), signal.SIGUSR1)
@@ -0,0 +1,83 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import homework
+import slim
+from benchmarks.stubs import PracticumStub, TelegramStub
+from tracker import HomeworkTracker
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_slim_session_reuses_connection():
+    with PracticumStub(homeworks=2) as practicum:
+        endpoint, homework.ENDPOINT = homework.ENDPOINT, practicum.endpoint
+        session = slim.SlimSession()
+        try:
+            for _ in range(2):
+                response = homework.fetch_api_answer(
+                    {'Authorization': 'OAuth token'}, 0, session,
+                )
+                assert len(homework.check_response(response)) == 2
+            assert practicum.requests == 2
+        finally:
+            homework.ENDPOINT = endpoint
+            session.close()
+    assert len(session.connections) == 0
+
+
+def test_slim_bot_sends_message():
+    with TelegramStub() as telegram_stub:
+        session = slim.SlimSession()
+        bot = slim.SlimBot('1:token', session, telegram_stub.base_url)
+        assert homework.deliver_message(bot, 42, 'Привет')
+        session.close()
+    assert telegram_stub.calls == [('sendMessage',
+                                    {'chat_id': 42, 'text': 'Привет'})]
+
+
+@pytest.mark.timeout(30)
+def test_slim_bot_does_not_load_telegram_on_success():
+    # В отдельном процессе: другие тесты уже могли загрузить telegram.
+    code = '\n'.join([
+        'import sys',
+        'import homework, slim',
+        'from benchmarks.stubs import TelegramStub',
+        'with TelegramStub() as stub:',
+        '    session = slim.SlimSession()',
+        '    bot = slim.SlimBot("1:token", session, stub.base_url)',
+        '    assert homework.deliver_message(bot, 42, "Привет")',
+        '    session.close()',
+        'assert "telegram.bot" not in sys.modules',
+    ])
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT,
+                            capture_output=True, text=True, timeout=30)
+    assert result.returncode == 0, result.stderr
+
+
+def test_slim_iteration_records_loop_metrics():
+    class Bot:
+        sent = []
+
+        def send_message(self, chat_id=None, text=None, **kwargs):
+            self.sent.append(text)
+
+    loops = sum(homework.LOOP_DURATION.counts)
+    with PracticumStub(homeworks=1) as practicum:
+        endpoint, homework.ENDPOINT = homework.ENDPOINT, practicum.endpoint
+        session = slim.SlimSession()
+        try:
+            current_timestamp = homework.poll_iteration(
+                Bot(), HomeworkTracker(), None,
+                slim.ErrorAggregator(), 0, session,
+            )
+        finally:
+            homework.ENDPOINT = endpoint
+            session.close()
+    assert current_timestamp > 0
+    assert len(Bot.sent) == 1
+    assert sum(homework.LOOP_DURATION.counts) == loops + 1
+    assert homework.CURSOR_LAG.function() < 60
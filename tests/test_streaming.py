@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from exceptions import CurrentDateError, WrongJSONDecode
+from streaming import HomeworkStream
+
+
+def chunked(payload, size=7):
+    body = payload if isinstance(payload, bytes) else json.dumps(
+        payload, ensure_ascii=False).encode()
+    return [body[start:start + size] for start in range(0, len(body), size)]
+
+
+def test_stream_yields_every_homework():
+    homeworks = [{'id': number, 'homework_name': f'работа {number}',
+                  'status': 'approved'} for number in range(50)]
+    stream = HomeworkStream(chunked({'homeworks': homeworks,
+                                     'current_date': 1234567890}))
+    assert list(stream) == homeworks
+    assert stream.current_date == 1234567890
+
+
+def test_current_date_before_homeworks_and_empty_list():
+    stream = HomeworkStream(chunked(b'{"current_date": 5, "homeworks": []}'))
+    assert list(stream) == []
+    assert stream.current_date == 5
+
+
+@pytest.mark.parametrize('body, error', [
+    (b'{"homeworks": [{"id": 1}, {"id": ', WrongJSONDecode),
+    (b'', WrongJSONDecode),
+    (b'[{"homeworks": []}]', TypeError),
+    (b'{"homeworks": {"id": 1}, "current_date": 1}', TypeError),
+    (b'{"current_date": 1}', KeyError),
+    (b'{"homeworks": [], "current_date": "1"}', CurrentDateError),
+])
+def test_stream_errors_match_check_response(body, error):
+    with pytest.raises(error):
+        list(HomeworkStream(chunked(body)))
@@ -0,0 +1,95 @@
+import multiprocessing
+import time
+
+import metrics
+from journal import Journal
+from supervisor import (WORKER_RESTARTS, WORKERS_ALIVE, Supervisor,
+                        rebalance_journals, shard_journal_path, shard_of)
+
+
+def test_shards_move_little_when_workers_added():
+    keys = [f'chat-{number}' for number in range(2000)]
+    before = {key: shard_of(key, 4) for key in keys}
+    after = {key: shard_of(key, 5) for key in keys}
+    moved = [key for key in keys if before[key] != after[key]]
+    assert all(after[key] == 4 for key in moved)
+    assert 0.1 < len(moved) / len(keys) < 0.3
+    assert set(before.values()) == {0, 1, 2, 3}
+
+
+def test_rebalance_journals_keeps_state(tmp_path):
+    path = str(tmp_path / 'journal')
+    for shard in range(2):
+        journal = Journal(shard_journal_path(path, shard, 2))
+        for number in range(shard, 20, 2):
+            journal.record_cursor(f'chat-{number}', number)
+            journal.record_status(f'chat-{number}', number, 'approved',
+                                  f'hw{number}.zip', 100)
+        journal.close()
+
+    rebalance_journals(path, 3)
+
+    restored = {}
+    for shard in range(3):
+        journal = Journal(shard_journal_path(path, shard, 3))
+        for key, cursor in journal.cursors.items():
+            assert shard_of(key, 3) == shard
+            restored[key] = (cursor, journal.restore(key)[1],
+                             journal.restore_details(key))
+        journal.close()
+    assert restored == {
+        f'chat-{number}': (number, {number: 'approved'}, (
+            {number: f'hw{number}.zip'},
+            [(100, f'hw{number}.zip', 'approved')]
+        )) for number in range(20)
+    }
+    assert sorted(file.name for file in tmp_path.iterdir()) == [
+        f'journal.{shard}-of-3' for shard in range(3)
+    ]
+
+
+def crash(shard, shards, snapshots, journal_path):
+    snapshots.put((shard, '# HELP up Up\n# TYPE up gauge\nup 1.0\n'))
+
+
+def test_crashed_worker_is_restarted():
+    supervisor = Supervisor(workers=2, journal_path=None, target=crash,
+                            context=multiprocessing.get_context('fork'),
+                            restart_delay=0.05)
+    supervisor.start()
+    try:
+        deadline = time.monotonic() + 1.5
+        while (time.monotonic() < deadline
+               and WORKER_RESTARTS.labels(1).value < 1):
+            supervisor.check()
+            time.sleep(0.02)
+        supervisor.collect()
+    finally:
+        supervisor.stop()
+    assert WORKER_RESTARTS.labels(1).value >= 1
+    assert set(supervisor.collected) == {'0', '1'}
+
+
+def test_merge_expositions_labels_each_worker():
+    text = metrics.merge_expositions({
+        '0': '# HELP up Up\n# TYPE up gauge\nup 1.0\n'
+             '# HELP req Req\n# TYPE req counter\nreq{code="200"} 2.0\n',
+        '1': '# HELP up Up\n# TYPE up gauge\nup 0.0\n',
+    })
+    assert text == (
+        '# HELP up Up\n# TYPE up gauge\nup{worker="0"} 1.0\n'
+        'up{worker="1"} 0.0\n'
+        '# HELP req Req\n# TYPE req counter\nreq{code="200",worker="0"} 2.0\n'
+    )
+
+
+def test_metrics_route_has_one_header_per_family():
+    supervisor = Supervisor(workers=2, journal_path=None)
+    worker = metrics.REGISTRY.expose()
+    supervisor.collected.update({'0': worker, '1': worker})
+    WORKERS_ALIVE.set(2)
+    _, _, body = supervisor.metrics_route()
+    types = [line.split()[2] for line in body.splitlines()
+             if line.startswith('# TYPE ')]
+    assert len(types) == len(set(types))
+    assert 'homework_workers_alive 2.0' in body
@@ -0,0 +1,31 @@
+from records import Homework
+from tracker import HomeworkTracker
+
+
+def test_diff_returns_only_transitions():
+    tracker = HomeworkTracker()
+    first = Homework(1, 'hw', 'reviewing')
+    second = Homework(2, 'hw', 'reviewing')
+    assert tracker.diff([first, second]) == [first, second]
+    tracker.commit(first)
+    tracker.commit(second)
+    assert tracker.diff([first, second]) == []
+    approved = Homework(2, 'hw', 'approved')
+    assert tracker.diff([approved, first]) == [approved]
+
+
+def test_commit_notifies_listener():
+    committed = []
+    tracker = HomeworkTracker(
+        on_commit=lambda *args: committed.append(args)
+    )
+    tracker.commit(Homework('hw', 'hw', 'approved', 100))
+    assert committed == [('hw', 'approved', 'hw', 100)]
+
+
+def test_latest_status_follows_history():
+    tracker = HomeworkTracker({1: 'approved'})
+    assert tracker.latest_status() == 'approved'
+    tracker.commit(Homework(2, 'hw2.zip', 'reviewing', 100))
+    assert tracker.latest_status() == 'reviewing'
+    assert HomeworkTracker().latest_status() is None
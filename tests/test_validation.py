@@ -0,0 +1,91 @@
+import json
+
+import homework
+import utils
+from records import Homework
+from tracker import HomeworkTracker
+from validation import Field, Quarantine, compile_validator, homework_validator
+
+VALIDATE = homework_validator(homework.HOMEWORK_VERDICTS)
+
+
+def test_valid_records_match_hand_written_checks():
+    homeworks = [
+        {'id': 7, 'status': 'approved', 'homework_name': 'hw.zip',
+         'date_updated': '2020-02-13T14:40:57Z', 'lesson_name': 'lesson'},
+        {'homework_name': 'hw2', 'status': 'rejected'},
+    ]
+    records, invalid = VALIDATE(homeworks)
+    assert invalid == []
+    assert records == [Homework.from_dict(data, homework.HOMEWORK_VERDICTS)
+                       for data in homeworks]
+    assert records[0].updated == 1581604857
+
+
+def test_all_problems_are_collected():
+    homeworks = [
+        {'homework_name': 'ok', 'status': 'approved'},
+        {'status': 'unknown', 'id': True},
+        ['hw'],
+        {'homework_name': 5, 'status': None, 'date_updated': 1},
+    ]
+    records, invalid = VALIDATE(homeworks)
+    assert [record.name for record in records] == ['ok']
+    assert [record.index for record in invalid] == [1, 2, 3]
+    assert [field for field, _ in invalid[0].errors] == [
+        'homework_name', 'status', 'id'
+    ]
+    assert invalid[1].errors[0][0] == 'record'
+    assert [field for field, _ in invalid[2].errors] == [
+        'homework_name', 'status', 'date_updated'
+    ]
+
+
+def test_field_names_do_not_clash_with_generated_code():
+    validate = compile_validator(
+        (Field('data', (int,)), Field('errors', (int,)),
+         Field('class', (str,)), Field('not-an-id', (str,))),
+        '({data}, {errors}, {class}, {not-an-id})'
+    )
+    records, invalid = validate([
+        {'data': 1, 'errors': 2, 'class': 'a', 'not-an-id': 'b'},
+        {'data': 1, 'errors': 'x', 'class': 'a'},
+    ])
+    assert records == [(1, 2, 'a', 'b')]
+    assert [field for field, _ in invalid[0].errors] == ['errors',
+                                                         'not-an-id']
+
+
+def test_iter_records_validates_as_it_reads(monkeypatch):
+    monkeypatch.setattr(homework, 'QUARANTINE', Quarantine())
+    read = []
+
+    def homeworks():
+        for number in range(3):
+            read.append(number)
+            yield {'id': number, 'homework_name': 'hw', 'status': 'approved'}
+        yield {'id': 3, 'status': 'lost'}
+
+    records = homework.iter_records(homeworks())
+    assert next(records).key == 0
+    assert read == [0]
+    assert [record.key for record in records] == [1, 2]
+    assert read == [0, 1, 2]
+
+
+def test_invalid_records_are_quarantined(monkeypatch, tmp_path):
+    path = tmp_path / 'quarantine.jsonl'
+    monkeypatch.setattr(homework, 'QUARANTINE', Quarantine(str(path)))
+    bot = utils.MockTelegramBot()
+    sent = []
+    bot.send_message = lambda chat_id=None, text=None, **kwargs: (
+        sent.append(text)
+    )
+    homework.process_homeworks(bot, HomeworkTracker(), [
+        {'id': 1, 'homework_name': 'good', 'status': 'approved'},
+        {'id': 2, 'homework_name': 'bad', 'status': 'lost'},
+    ])
+    assert len(sent) == 1 and '"good"' in sent[0]
+    line = json.loads(path.read_text())
+    assert line['key'] == 2
+    assert line['errors'][0][0] == 'status'
@@ -0,0 +1,86 @@
+import pytest
+
+from benchmarks.stubs import UpdateDelivery
+from homework import HOMEWORK_VERDICTS
+from records import Homework
+from tracker import HomeworkTracker
+from webhook import (COMMAND_LATENCY, HELP_TEXT, StatusBoard, parse_command,
+                     start_webhook_server)
+
+
+def make_board():
+    tracker = HomeworkTracker()
+    tracker.commit(Homework(1, 'hw1.zip', 'reviewing', 100))
+    tracker.commit(Homework(1, 'hw1.zip', 'approved', 200))
+    board = StatusBoard(HOMEWORK_VERDICTS)
+    board.register(42, tracker)
+    return board, tracker
+
+
+def test_parse_command():
+    assert parse_command({'message': {'chat': {'id': 1},
+                                      'text': '/status@bot now'}}) == (
+        1, '/status')
+    assert parse_command({'message': {'chat': {'id': 1},
+                                      'text': 'привет'}}) == (None, None)
+    assert parse_command({'callback_query': {}}) == (None, None)
+
+
+def test_answers_are_cached_until_next_transition():
+    board, tracker = make_board()
+    status = board.answer(42, '/status')
+    assert status == f'hw1.zip: {HOMEWORK_VERDICTS["approved"]}'
+    assert board.answer(42, '/status') is status
+    history = board.answer(42, '/history').splitlines()
+    assert history[0].endswith(HOMEWORK_VERDICTS['approved'])
+    assert history[1].endswith(HOMEWORK_VERDICTS['reviewing'])
+    tracker.commit(Homework(2, 'hw2.zip', 'reviewing', 300))
+    assert 'hw2.zip' in board.answer(42, '/status')
+    assert board.answer(7, '/status') is None
+
+
+def test_webhook_replies_in_response_body():
+    board, _ = make_board()
+    server = start_webhook_server(board, port=0, secret='s3cret',
+                                  host='127.0.0.1')
+    url = f'http://127.0.0.1:{server.server_address[1]}/webhook'
+    delivery = UpdateDelivery(url, secret='s3cret')
+    try:
+        for _ in range(200):
+            status, reply = delivery.send_command(42, '/status')
+            assert status == 200
+        assert reply == {'method': 'sendMessage', 'chat_id': 42,
+                         'text': f'hw1.zip: {HOMEWORK_VERDICTS["approved"]}'}
+        assert delivery.send_command(7, '/status') == (200, None)
+        assert UpdateDelivery(url).send_command(42, '/status')[0] == 403
+        assert UpdateDelivery(url, secret='s3cre').send_command(
+            42, '/status')[0] == 403
+    finally:
+        delivery.close()
+        server.shutdown()
+        server.server_close()
+
+
+def test_webhook_refuses_to_start_without_secret():
+    board, _ = make_board()
+    with pytest.raises(ValueError):
+        start_webhook_server(board, port=0, secret='', host='127.0.0.1')
+
+
+def test_unknown_commands_share_cache_and_metric_series():
+    board, _ = make_board()
+    server = start_webhook_server(board, port=0, secret='s3cret',
+                                  host='127.0.0.1')
+    url = f'http://127.0.0.1:{server.server_address[1]}/webhook'
+    delivery = UpdateDelivery(url, secret='s3cret')
+    try:
+        for number in range(50):
+            status, reply = delivery.send_command(42, f'/x{number}')
+            assert reply['text'] == HELP_TEXT
+    finally:
+        delivery.close()
+        server.shutdown()
+        server.server_close()
+    assert set(board._cache) == {('42', 'other')}
+    assert not any(labels[0].startswith('/x')
+                   for labels in COMMAND_LATENCY._children)
@@ -114,6 +114,16 @@ class MockTelegramBot:
         self.text = text
 
 
+class FakeClock:
+    """Часы для тестов: время меняется присваиванием now."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
 class BreakInfiniteLoop(Exception):
     pass
 
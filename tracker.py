@@ -0,0 +1,57 @@
+"""Отслеживание статусов отдельных домашних работ."""
+import os
+import time
+from collections import deque
+
+from records import Homework
+
+HISTORY_SIZE = int(os.getenv('HISTORY_SIZE', 20))
+
+
+class HomeworkTracker:
+    """Последние известные статусы работ одного пользователя.
+
+    Ключ работы - её id, а если его нет - название (Homework.key).
+
+    API отдаёт только работы, обновлённые после from_date, поэтому
+    сравнение ответа с таблицей статусов стоит O(изменившихся работ),
+    а не O(всей истории).
+
+    on_commit вызывается после каждого перехода с ключом, статусом,
+    названием и временем перехода работы.
+    """
+
+    def __init__(self, statuses: dict = None, on_commit=None,
+                 history_size: int = HISTORY_SIZE, names: dict = None,
+                 history: list = ()):
+        self.statuses = {} if statuses is None else statuses
+        self.on_commit = on_commit
+        self.names = {} if names is None else names
+        # Последние переходы: (время, название, статус).
+        self.history = deque(history, maxlen=history_size)
+        # Растёт при каждом переходе, по нему сбрасываются кэши ответов.
+        self.version = 0
+
+    def latest_status(self):
+        """Статус последнего перехода, None для пустого трекера."""
+        if self.history:
+            return self.history[-1][2]
+        return next(reversed(self.statuses.values()), None)
+
+    def diff(self, records: list) -> list:
+        """Записи, статус которых отличается от известного."""
+        return [record for record in records if self.is_changed(record)]
+
+    def is_changed(self, record: Homework) -> bool:
+        """Отличается ли статус работы от известного."""
+        return self.statuses.get(record.key) != record.status
+
+    def commit(self, record: Homework) -> None:
+        """Запоминает статус работы после обработки перехода."""
+        updated = record.updated or int(time.time())
+        self.statuses[record.key] = record.status
+        self.names[record.key] = record.name
+        self.history.append((updated, record.name, record.status))
+        self.version += 1
+        if self.on_commit is not None:
+            self.on_commit(record.key, record.status, record.name, updated)
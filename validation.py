@@ -0,0 +1,203 @@
+"""Проверка работ из ответа API по декларативной схеме.
+
+Схема - кортеж Field. compile_validator один раз превращает её в
+функцию на Python без циклов по полям и без исключений: за один проход
+по списку работ она строит записи для корректных работ и собирает все
+ошибки каждой некорректной работы, не останавливаясь на первой.
+Некорректные работы откладываются в карантин (Quarantine), а
+корректные идут дальше по конвейеру.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import NamedTuple
+
+import metrics
+from records import Homework
+
+logger = logging.getLogger(__name__)
+
+QUARANTINE_PATH = os.getenv('QUARANTINE_PATH', '')
+
+QUARANTINED = metrics.counter(
+    'homework_quarantined_records',
+    'Работы из ответа API, не прошедшие проверку', ('field',)
+)
+
+
+class Field(NamedTuple):
+    """Поле работы в ответе API."""
+
+    name: str
+    types: tuple
+    required: bool = True
+    choices: frozenset = None
+
+
+class InvalidRecord(NamedTuple):
+    """Некорректная работа: номер в ответе, исходные данные и ошибки.
+
+    errors - кортеж пар (поле, описание ошибки).
+    """
+
+    index: int
+    data: object
+    errors: tuple
+
+    @property
+    def key(self):
+        """Ключ работы: id или название, если их удалось прочитать."""
+        if not isinstance(self.data, dict):
+            return None
+        return self.data.get('id', self.data.get('homework_name'))
+
+
+def homework_schema(verdicts: dict) -> tuple:
+    """Схема работы из ответа API."""
+    return (
+        Field('homework_name', (str,)),
+        Field('status', (str,), choices=frozenset(verdicts)),
+        Field('id', (int, str), required=False),
+        Field('date_updated', (str,), required=False),
+    )
+
+
+def _field_source(index: int, field: Field) -> list:
+    # Значение поля хранится в локальной переменной f<номер>, а имя поля
+    # попадает в код только строковым литералом: так любое имя, даже не
+    # идентификатор, не ломает код и не перекрывает переменные цикла.
+    value = f'f{index}'
+    types = ' или '.join(kind.__name__ for kind in field.types)
+    lines = [f'        {value} = get({field.name!r})',
+             f'        if {value} is None:']
+    if field.required:
+        lines.append(f'            errors += (({field.name!r}, '
+                     f'"нет значения"),)')
+    else:
+        lines.append('            pass')
+    # Проверка точного типа быстрее isinstance; bool не сойдёт за int.
+    if len(field.types) == 1:
+        lines.append(f'        elif {value}.__class__ is not types{index}:')
+    else:
+        lines.append(f'        elif {value}.__class__ not in types{index}:')
+    lines.append(f'            errors += (({field.name!r}, "ожидается '
+                 f'{types}, получено " + type({value}).__name__),)')
+    if field.choices is not None:
+        lines += [
+            f'        elif {value} not in choices{index}:',
+            f'            errors += (({field.name!r}, '
+            f'"неизвестное значение " + repr({value})),)',
+        ]
+    return lines
+
+
+def compile_validator(schema: tuple, build: str, namespace: dict = None,
+                      generator: bool = False):
+    """Функция проверки списка работ по схеме.
+
+    Возвращаемая функция принимает итерируемый список работ и отдаёт
+    (записи корректных работ, список InvalidRecord). С generator=True
+    она принимает ещё и список для InvalidRecord и отдаёт записи по
+    одной, не держа их все в памяти.
+
+    build - выражение, строящее запись из проверенных значений; поля
+    схемы подставляются в него по шаблону str.format ({имя поля}), а
+    имена из namespace доступны как есть. Выражение встраивается в цикл
+    проверки, а не вызывается отдельной функцией на каждую работу.
+    """
+    names = {**(namespace or {}), 'InvalidRecord': InvalidRecord,
+             'type': type, 'isinstance': isinstance}
+    if generator:
+        lines = ['def validate(homeworks, invalid):']
+    else:
+        lines = [
+            'def validate(homeworks):',
+            '    valid = []',
+            '    invalid = []',
+            '    append = valid.append',
+        ]
+    lines += [
+        '    for index, data in enumerate(homeworks):',
+        '        if not isinstance(data, dict):',
+        '            invalid.append(InvalidRecord(index, data, (("record", '
+        '"работа не является dict"),)))',
+        '            continue',
+        '        get = data.get',
+        '        errors = ()',
+    ]
+    for index, field in enumerate(schema):
+        names[f'types{index}'] = (field.types[0] if len(field.types) == 1
+                                  else frozenset(field.types))
+        names[f'choices{index}'] = field.choices
+        lines += _field_source(index, field)
+    record = build.format_map({field.name: f'f{index}'
+                               for index, field in enumerate(schema)})
+    lines += [
+        '        if errors:',
+        '            invalid.append(InvalidRecord(index, data, errors))',
+        '            continue',
+    ]
+    if generator:
+        lines.append(f'        yield {record}')
+    else:
+        lines += [f'        append({record})',
+                  '    return valid, invalid']
+    # validate собирается внутри фабрики, чтобы все имена из names
+    # были в замыкании, а не искались в глобальных переменных.
+    source = '\n'.join([f'def factory({", ".join(names)}):']
+                       + [f'    {line}' for line in lines]
+                       + ['    return validate'])
+    scope = {}
+    exec(compile(source, '<schema>', 'exec'), scope)
+    return scope['factory'](**names)
+
+
+# Запись о работе из проверенных полей схемы homework_schema. Статус
+# берётся из statuses - словаря интернированных строк, что дешевле
+# вызова sys.intern; дату Homework разбирает при первом обращении.
+BUILD_HOMEWORK = ('Homework({homework_name} if {id} is None else {id}, '
+                  '{homework_name}, statuses[{status}], {date_updated})')
+
+
+def homework_validator(verdicts: dict, generator: bool = False):
+    """Скомпилированная проверка работ для заданных вердиктов."""
+    return compile_validator(homework_schema(verdicts), BUILD_HOMEWORK, {
+        'Homework': Homework,
+        'statuses': {sys.intern(status): sys.intern(status)
+                     for status in verdicts},
+    }, generator)
+
+
+class Quarantine:
+    """Журнал некорректных работ.
+
+    Каждая работа пишется в лог и, если задан path, строкой JSON в
+    файл: {"ts": unix-время, "key": id или название, "errors": [...],
+    "data": исходная работа}.
+    """
+
+    def __init__(self, path: str = QUARANTINE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def add(self, invalid: list) -> None:
+        """Откладывает некорректные работы."""
+        lines = []
+        for record in invalid:
+            for field, _ in record.errors:
+                QUARANTINED.labels(field).inc()
+            logger.warning('Работа %r отложена в карантин: %s', record.key,
+                           '; '.join(f'{field}: {message}'
+                                     for field, message in record.errors))
+            lines.append(json.dumps({
+                'ts': round(time.time(), 3), 'key': record.key,
+                'errors': [list(error) for error in record.errors],
+                'data': record.data,
+            }, ensure_ascii=False, default=repr) + '\n')
+        if not self.path:
+            return
+        with self._lock, open(self.path, 'a', encoding='UTF-8') as file:
+            file.writelines(lines)
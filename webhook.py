@@ -0,0 +1,179 @@
+"""Webhook для команд /status и /history.
+
+Бот принимает обновления telegram на WEBHOOK_PORT и отвечает из
+известных ему статусов работ, не обращаясь к API Практикума. Ответ
+возвращается прямо в теле ответа на webhook-запрос, поэтому на команду
+не тратится отдельный запрос к Bot API. Адрес webhook задаётся через
+setWebhook, секрет из WEBHOOK_SECRET передаётся там же в secret_token.
+Без секрета сервер не запускается: иначе любой, кто достучится до
+порта, получит статусы работ любого чата.
+"""
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 0))
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+COMMAND_LATENCY = metrics.histogram(
+    'homework_webhook_command_seconds', 'Время ответа на команду',
+    labelnames=('command',)
+)
+
+HELP_TEXT = ('/status - последние статусы работ\n'
+             '/history - последние изменения статусов')
+COMMANDS = frozenset(('/status', '/history'))
+# Любая другая команда: одна метка метрики и один ключ кэша, чтобы
+# произвольный текст из чата не плодил серии и записи кэша.
+OTHER_COMMAND = 'other'
+
+
+class StatusBoard:
+    """Ответы на команды по трекерам подписок чатов.
+
+    Готовые ответы кэшируются до следующего перехода статуса в любом
+    из трекеров чата, поэтому поток одинаковых команд не пересобирает
+    текст заново.
+    """
+
+    def __init__(self, verdicts: dict):
+        self.verdicts = verdicts
+        self.trackers = {}
+        self._cache = {}
+
+    def register(self, chat_id, tracker) -> None:
+        """Добавляет трекер подписки чата chat_id."""
+        self.trackers.setdefault(str(chat_id), []).append(tracker)
+
+    def answer(self, chat_id, command: str):
+        """Текст ответа на команду или None, если чат неизвестен."""
+        trackers = self.trackers.get(str(chat_id))
+        if trackers is None:
+            return None
+        command = normalize_command(command)
+        version = tuple(tracker.version for tracker in trackers)
+        key = (str(chat_id), command)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        if command == '/status':
+            text = self.render_status(trackers)
+        elif command == '/history':
+            text = self.render_history(trackers)
+        else:
+            text = HELP_TEXT
+        self._cache[key] = (version, text)
+        return text
+
+    def render_status(self, trackers: list) -> str:
+        """Последний известный статус каждой работы."""
+        lines = [
+            f'{tracker.names.get(key, key)}: '
+            f'{self.verdicts.get(status, status)}'
+            for tracker in trackers
+            for key, status in list(tracker.statuses.items())
+        ]
+        return '\n'.join(lines) or 'Статусов пока нет.'
+
+    def render_history(self, trackers: list) -> str:
+        """Последние переходы статусов, новые сверху."""
+        entries = sorted(
+            (entry for tracker in trackers for entry in list(tracker.history)),
+            reverse=True
+        )
+        lines = [
+            f'{time.strftime("%d.%m %H:%M", time.localtime(updated))} '
+            f'{name}: {self.verdicts.get(status, status)}'
+            for updated, name, status in entries
+        ]
+        return '\n'.join(lines) or 'Изменений пока не было.'
+
+
+def normalize_command(command: str) -> str:
+    """Известная команда как есть, остальные - OTHER_COMMAND."""
+    return command if command in COMMANDS else OTHER_COMMAND
+
+
+def parse_command(update: dict) -> tuple:
+    """(chat_id, команда) из обновления или (None, None)."""
+    message = update.get('message') or update.get('edited_message') or {}
+    text = message.get('text') or ''
+    chat_id = (message.get('chat') or {}).get('id')
+    if chat_id is None or not text.startswith('/'):
+        return None, None
+    # /status@имя_бота и аргументы после команды не важны.
+    return chat_id, text.split()[0].split('@')[0]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Заголовки и тело пишутся разными send(): без TCP_NODELAY на
+    # keep-alive соединении каждый ответ ждал бы отложенного ACK.
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        started = time.perf_counter()
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if not hmac.compare_digest(
+                self.headers.get(SECRET_HEADER, '').encode('utf-8'),
+                self.server.secret.encode('utf-8')):
+            self._reply(HTTPStatus.FORBIDDEN)
+            return
+        try:
+            chat_id, command = parse_command(json.loads(body))
+        except (ValueError, AttributeError):
+            self._reply(HTTPStatus.BAD_REQUEST)
+            return
+        text = (self.server.board.answer(chat_id, command)
+                if command else None)
+        if text is None:
+            self._reply(HTTPStatus.OK)
+            return
+        self._reply(HTTPStatus.OK, {'method': 'sendMessage',
+                                    'chat_id': chat_id, 'text': text})
+        COMMAND_LATENCY.labels(normalize_command(command)).observe(
+            time.perf_counter() - started
+        )
+
+    def _reply(self, status: int, payload: dict = None) -> None:
+        body = (json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                if payload else b'')
+        self.send_response(status)
+        if payload:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_webhook_server(board: StatusBoard, port: int = WEBHOOK_PORT,
+                         secret: str = WEBHOOK_SECRET,
+                         host: str = '0.0.0.0') -> ThreadingHTTPServer:
+    """Запускает webhook-сервер в фоновом потоке.
+
+    Поднимает ValueError, если секрет не задан.
+    """
+    if not secret:
+        raise ValueError('WEBHOOK_SECRET не задан, webhook не запущен')
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.board = board
+    server.secret = secret
+    threading.Thread(target=server.serve_forever, name='webhook',
+                     daemon=True).start()
+    logger.info('Webhook принимает обновления на порту %d',
+                server.server_address[1])
+    return server